@@ -1,131 +1,215 @@
-import os
 import io
+import os
 import streamlit as st
 
-from datetime import datetime
+from datetime import datetime, time
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy.interpolate import interp1d
-from jinja2 import Template
-
-import json
-import openpyxl
-import base64
-
-with open('correction.json', 'r') as f:
-    DB_KOREKSI = json.load(f)
+import pyarrow as pa
+
+import hashlib
+
+from correction import CorrectionRegistry
+from campaign_store import CampaignStore
+from ingestion import UUT_LOGGER, load_standard, load_uut
+from pipeline import (STD_TIME_FORMAT, RESAMPLE_RULES, RESAMPLE_METHODS, convert_timestamp_column, apply_corrections, convert_uut_units,
+                      circular_columns, resample_frame, merge_data, filter_time_range, run_comparison)
+from columnar_cache import cache_key, load_frame, save_frame, to_parquet_bytes
+from downsample import level_of_detail
+from window_stats import WindowStats, find_stable_windows
+from profiling import PROFILE_LOG, StageProfiler, stage
+from report import EXPORT_FORMATS, EXCEL_MAX_ROWS, trend_png, export_bytes, decimal_floats, load_template, plot_series, report_plots, render_report
+
+@st.cache_resource(show_spinner=False)
+def load_registry():
+    return CorrectionRegistry('correction.json')
+
+REGISTRY = load_registry()
+registry_error = None
+try:
+    REGISTRY.refresh() #muat ulang hanya jika correction.json berubah
+except (ValueError, OSError) as e:
+    #file setengah tersimpan/rusak: tabel terakhir yang valid tetap dipakai
+    registry_error = e
 
 UNIT_LIST = ["hPa","InHg","m/s","knot"]
-UUT_LOGGER = ["CS","Vaisala/AWI"]
-
-def convert_columns_to_float(df, exclude_cols):
-    for col in df.columns:
-        if col not in exclude_cols:
-            try:
-                df[col] = df[col].str.replace(',', '.').astype(float) #konversi desimal yang pakai koma
-            except (ValueError, AttributeError):
-                df[col] = pd.to_numeric(df[col], errors='coerce') #konversi desimal yang pakai titik
-    return df
-
-def clean_std_df(input_df):
-    std_df = input_df.copy()
-    std_df.columns = std_df.columns.str.strip()
-    new_header = []
-    for i, col in enumerate(std_df.columns):
-        if 'Unnamed' in col and i > 0:
-            next_col = std_df.columns[i+1] if i+1 < len(std_df.columns) else ''
-            new_header.append(f'Stat_{next_col}')
-        elif i == 0:
-            new_header.append('Timestamp')
-        else:
-            new_header.append(col)
-    
-    std_df.columns = new_header #ubah format header standar
-    std_df = std_df.dropna(axis=1,how='all') #hapus kolom lebih
-    std_df = std_df.drop([0]).reset_index(drop=True) #hapus baris lebih
-
-    std_df_cols = std_df.columns
-    status_std_cols = [col for col in std_df_cols if col.lower().startswith("stat")]
-
-    #Hapus kolom dari sensor yang tidak terpakai (kolom invalid)
-    invalid_stat_columns = [col for col in status_std_cols if (std_df[col] == "INVALID").all()]
+MAX_UUT = 8
+SUMBER_UPLOAD, SUMBER_ARSIP = "Upload CSV", "Arsip kampanye"
+STORE = CampaignStore()
+
+def file_digest(uploaded_file):
+    return hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+
+# Tahapan pipeline di-cache berdasarkan hash isi file + nilai widget terkait,
+# argumen berawalan "_" tidak ikut di-hash oleh Streamlit. Hasil parsing dan
+# merge juga disimpan ke cache Feather di disk agar bisa dibuka ulang tanpa parsing CSV.
+@st.cache_data(show_spinner=False, max_entries=4)
+def cached_standard(std_digests, _standard_files, _profiler=None):
+    key = cache_key("standard", std_digests)
+    cached = load_frame(key)
+    if cached is not None:
+        return cached
+    df_standard, invalid_counts = load_standard(_standard_files, profiler=_profiler)
+    save_frame(key, df_standard, meta=invalid_counts)
+    return df_standard, invalid_counts
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def cached_uut(uut_digest, id_logger, _uut_file, _profiler=None):
+    key = cache_key("uut", uut_digest, id_logger)
+    cached = load_frame(key)
+    if cached is not None:
+        return cached[0]
+    df_uut = load_uut(_uut_file, id_logger, profiler=_profiler)
+    save_frame(key, df_uut)
+    return df_uut
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_store_range(kind, unit_id, start, end, version):
+    #version berubah bila partisi di rentang itu ditulis ulang
+    return STORE.load_range(kind, unit_id, start, end)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def cached_std_timestamps(std_digests, ts_col_std, _df_standard):
+    return convert_timestamp_column(_df_standard, ts_col_std, STD_TIME_FORMAT)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_uut_timestamps(uut_digest, id_logger, ts_col_uut, _df_uut):
+    return convert_timestamp_column(_df_uut, ts_col_uut)
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def cached_corrected_standard(correction_key, _df_standard, _params_mapping, _ts_col_std, _id_std, _resample_rule=None, _resample_how="mean",
+                              _profiler=None):
+    #Koreksi (dan resampling) data standar dihitung sekali, dipakai bersama oleh semua UUT
+    #yang memetakan kolom standar yang sama
+    with stage(_profiler, "koreksi standar", baris=len(_df_standard)):
+        df_standard = apply_corrections(_df_standard.copy(deep=False), _params_mapping, _id_std, REGISTRY)
+    circular_std, _ = circular_columns(_params_mapping)
+    with stage(_profiler, "resample standar") as rec:
+        df_standard = resample_frame(df_standard, _ts_col_std, _resample_rule, _resample_how, circular_std)
+        rec["baris"] = len(df_standard)
+    return df_standard
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def cached_merge(merge_key, _df_standard, _df_uut, _ts_col_std, _ts_col_uut, _params_mapping, _header_mapping, _unit_conversions,
+                 _resample_rule=None, _resample_how="mean", _profiler=None):
+    key = cache_key("merged", merge_key)
+    with stage(_profiler, "baca cache Feather") as rec:
+        cached = load_frame(key)
+        rec["baris"] = len(cached[0]) if cached is not None else 0
+    if cached is not None:
+        return cached[0]
+    df_uut = convert_uut_units(_df_uut.copy(deep=False), _unit_conversions)
+    _, circular_uut = circular_columns(_params_mapping)
+    with stage(_profiler, "resample UUT") as rec:
+        df_uut = resample_frame(df_uut, _ts_col_uut, _resample_rule, _resample_how, circular_uut)
+        rec["baris"] = len(df_uut)
+    with stage(_profiler, "merge_asof") as rec:
+        df_merged = merge_data(_df_standard, df_uut, _ts_col_std, _ts_col_uut, _header_mapping)
+        rec["baris"] = len(df_merged)
+    with stage(_profiler, "tulis cache Feather"):
+        save_frame(key, df_merged)
+    return df_merged
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def cached_window_stats(merge_key, _df_merged, _params_mapping, _ts_col_std, _profiler=None):
+    #Prefix sum per parameter dibangun sekali per hasil merge, tiap perubahan rentang waktu cukup O(1)
+    with stage(_profiler, "prefix sum", baris=len(_df_merged)):
+        return WindowStats(_df_merged, _params_mapping, _ts_col_std)
+
+def lazy_download(container, label, key, data_key, build, file_name, mime):
+    #Berkas unduhan baru dibangun saat tombol "Siapkan" ditekan, lalu disimpan di
+    #session_state selama data_key (data + rentang waktu + format) tidak berubah
+    prepared = st.session_state.get(key)
+    if container.button(label.replace("Unduh", "Siapkan"), key=f"siapkan-{key}"):
+        with profiler.stage(f"ekspor {key}"):
+            prepared = (data_key, build().getvalue())
+        st.session_state[key] = prepared
+    if prepared and prepared[0] == data_key:
+        container.download_button(label=label, data=prepared[1], file_name=file_name, mime=mime, key=f"unduh-{key}")
+
+def float32_column_config(df):
+    #Kolom float32 ditampilkan dengan 7 digit signifikan (presisi float32) agar 1008.1 tidak
+    #muncul sebagai 1008.0999755859375; format di frontend, tanpa konversi data tiap rerun
+    return {col: st.column_config.NumberColumn(format="%.7g") for col in df.columns[(df.dtypes == "float32").to_numpy()]}
+
+def mapping_widgets(option_std, option_uut, suffix=""):
+    #Widget mapping header satu UUT, suffix membedakan key widget antar UUT
+    header_mapping = {}
+    params_mapping = {}
+    unit_conversions = {}
 
-    sensor_columns_to_drop = [
-        col.replace('Stat_', '') for col in invalid_stat_columns 
-        if col.replace('Stat_', '') in std_df_cols
-    ]
+    col_t,col_rh= st.columns(2)
+    col_t.subheader("🌡Suhu Udara")
+    tt_std = col_t.selectbox(f"Header Suhu Standar", ["-"] + option_std, key=f"tt_std{suffix}")
+    tt_uut = col_t.selectbox(f"Header Suhu UUT",["-"] + option_uut, key=f"tt_uut{suffix}")
+    if tt_std != "-" and tt_uut != "-":
+        header_mapping[tt_std] = tt_uut
+        params_mapping["Suhu"] = [tt_std,tt_uut,"TT"]
 
-    drop_cols = invalid_stat_columns + sensor_columns_to_drop
-    std_df = std_df.drop(columns=drop_cols)
+    col_rh.subheader("💦 Kelembapan")
+    rh_std = col_rh.selectbox(f"Header Kelembapan Standar",["-"] + option_std, key=f"rh_std{suffix}")
+    rh_uut = col_rh.selectbox(f"Header Kelembapan UUT",["-"] + option_uut, key=f"rh_uut{suffix}")
+    if rh_std != "-" and rh_uut != "-":
+        header_mapping[rh_std] = rh_uut
+        params_mapping["Kelembapan"] = [rh_std,rh_uut,"RH"]
 
-    #Hapus baris data yang invalid
-    status_std_cols = [col for col in status_std_cols if col not in invalid_stat_columns]
-    if status_std_cols:
-        invalid_mask = std_df[status_std_cols].apply(lambda row: row.str.upper().str.contains("INVALID"), axis=1).any(axis=1)
-        std_df = std_df[~invalid_mask]
+    col_p,col_ws = st.columns(2)
+    col_p.subheader("🎈 Tekanan")
+    pp_std = col_p.selectbox(f"Header Tekanan Standar",["-"] + option_std, key=f"pp_std{suffix}")
+    pp_uut = col_p.selectbox(f"Header Tekanan UUT",["-"] + option_uut, key=f"pp_uut{suffix}")
+    konversi_pp = col_p.checkbox("Konversi satuan UUT InHg ke hPa", value=False, key=f"konversi_pp{suffix}")
+    if pp_std != "-" and pp_uut != "-":
+        header_mapping[pp_std] = pp_uut
+        params_mapping["Tekanan"] = [pp_std,pp_uut,"PP"]
+        if konversi_pp:
+            unit_conversions[pp_uut] = ("InHg", "hPa")
     
-    #Konversi data numerik ke float
-    exclude_cols_std = [std_df.columns[0]] + status_std_cols
-    std_df = convert_columns_to_float(std_df, exclude_cols_std)
-
-    return std_df
-
-# Fungsi konversi satuan
-def convert_unit(value, from_unit, to_unit):
-    if from_unit == to_unit or "-" in (from_unit, to_unit):
-        return value
-    if from_unit == "InHg" and to_unit == "hPa":
-        return value * 33.86388
-    if from_unit == "hPa" and to_unit == "InHg":
-        return value / 33.86388
-    if from_unit == "m/s" and to_unit == "knot":
-        return value / 0.514444
-    if from_unit == "knot" and to_unit == "m/s":
-        return value * 0.514444
-    return value
-
-def cari_koreksi_scipy(id_aws, parameter, nilai_baca):
+    col_ws.subheader("🍃 Kecepatan Angin")
+    ws_std = col_ws.selectbox(f"Header Kec. Angin Standar",["-"] + option_std, key=f"ws_std{suffix}")
+    ws_uut = col_ws.selectbox(f"Header Kec. Angin UUT",["-"] + option_uut, key=f"ws_uut{suffix}")
+    konversi_ws = col_ws.checkbox("Konversi satuan UUT knot ke m/s", value=False, key=f"konversi_ws{suffix}")
+    if ws_std != "-" and ws_uut != "-":
+        header_mapping[ws_std] = ws_uut
+        params_mapping["Kecepatan Angin"] = [ws_std,ws_uut,"WS"]
+        if konversi_ws:
+            unit_conversions[ws_uut] = ("knot", "m/s")
     
-    daftar_koreksi = DB_KOREKSI[id_aws][parameter]
-    daftar_koreksi = sorted(daftar_koreksi, key=lambda x: x['setpoin'])
+    col_wd,col_sr = st.columns(2)
+    col_wd.subheader("🌬 Arah Angin")
+    wd_std = col_wd.selectbox(f"Header Arah Angin Standar",["-"] + option_std, key=f"wd_std{suffix}")
+    wd_uut = col_wd.selectbox(f"Header Arah Angin UUT",["-"] + option_uut, key=f"wd_uut{suffix}")
+    if wd_std != "-" and wd_uut != "-":
+        header_mapping[wd_std] = wd_uut
+        params_mapping["Arah Angin"] = [wd_std,wd_uut,"WD"]
     
-    setpoints = [item['setpoin'] for item in daftar_koreksi]
-    koreksis = [item['koreksi'] for item in daftar_koreksi]
-
-    interpolator = interp1d(
-        setpoints,
-        koreksis,
-        kind='linear',
-        fill_value=(koreksis[0], koreksis[-1]),  # Extrapolasi jika di luar range
-        bounds_error=False
-    )
-
-    koreksi = interpolator(nilai_baca)
-    return koreksi
-
-def convertPlotToBase64(fig):
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png")
-    buf.seek(0)
-    return base64.b64encode(buf.read()).decode()
-
-def plot_parameter(df, param, std_col, uut_col):
-    data = df
-
-    fig, ax = plt.subplots(figsize=(15, 7))
-    ax.plot(data["Timestamp"], data[std_col], label="Standard")
-    ax.plot(data["Timestamp"], data[uut_col], label="UUT")
+    col_sr.subheader("☀️ Radiasi Matahari")
+    sr_std = col_sr.selectbox(f"Header Radiasi Matahari Standar",["-"] + option_std, key=f"sr_std{suffix}")
+    sr_uut = col_sr.selectbox(f"Header Radiasi Matahari UUT",["-"] + option_uut, key=f"sr_uut{suffix}")
+    if sr_std != "-" and sr_uut != "-":
+        header_mapping[sr_std] = sr_uut
+        params_mapping["Radiasi Matahari"] = [sr_std,sr_uut,"SR"]
+
+    col_wt,col_wpanci = st.columns(2)
+    col_wt.subheader("🌊 Suhu Air")
+    tw_std = col_wt.selectbox(f"Header Suhu Air Standar",["-"] + option_std, key=f"tw_std{suffix}")
+    tw_uut = col_wt.selectbox(f"Header Suhu Air UUT",["-"] + option_uut, key=f"tw_uut{suffix}")
+    if tw_std != "-" and tw_uut != "-":
+        header_mapping[tw_std] = tw_uut
+        params_mapping["Suhu Air"] = [tw_std,tw_uut,"WT"]
     
-    ax.set_title(f"Grafik Tren {param}")
-    ax.legend()
-    ax.grid(True)
+    col_wpanci.subheader("🍃 Kec. Angin Panci")
+    wpanci_std = col_wpanci.selectbox(f"Header Suhu Air Standar",["-"] + option_std, key=f"wpanci_std{suffix}")
+    wpanci_uut = col_wpanci.selectbox(f"Header Suhu Air UUT",["-"] + option_uut, key=f"wpanci_uut{suffix}")
+    if wpanci_std != "-" and wpanci_uut != "-":
+        header_mapping[wpanci_std] = wpanci_uut
+        params_mapping["Kec. Angin Panci"] = [wpanci_std,wpanci_uut,"OVA"]
+    return header_mapping, params_mapping, unit_conversions
 
-    return fig
 
 st.set_page_config(page_title="Kalibrasi AWOS", layout="wide")
 st.title("🛠️ Kalibrasi & Perbandingan Data")
+if registry_error is not None:
+    st.error(f"❌ correction.json gagal dimuat ulang, tabel koreksi sebelumnya (sha256 {REGISTRY.digest[:12]}) tetap dipakai: {registry_error}")
 
 st.markdown("""
 Alat ini membandingkan data kalibrasi antara alat **standar** dan **unit under test (UUT)**.
@@ -137,55 +221,93 @@ st.logo('logo-bmkg.png',size="large", icon_image='logo-bmkg.png')
 st.sidebar.header("Laboratorium Kalibrasi BMKG Pusat")
 st.sidebar.divider()
 st.sidebar.subheader("📂 Upload Data")
-id_std = st.sidebar.selectbox("ID AWS Standar yang digunakan", options= list(DB_KOREKSI.keys()))
-standard_files = st.sidebar.file_uploader("Upload CSV Alat Standar (bisa lebih dari satu)", type=["csv"], accept_multiple_files=True)
-id_logger = st.sidebar.selectbox("Jenis Logger UUT", options= list(UUT_LOGGER))
-uut_file = st.sidebar.file_uploader("Upload CSV UUT", type=["csv"])
+id_std = st.sidebar.selectbox("ID AWS Standar yang digunakan", options= REGISTRY.ids())
+sumber = st.sidebar.radio("Sumber data", [SUMBER_UPLOAD, SUMBER_ARSIP], horizontal=True, key="sumber")
+standard_files, uut_inputs, arsip_uut = [], [], []
+if sumber == SUMBER_UPLOAD:
+    standard_files = st.sidebar.file_uploader("Upload CSV Alat Standar (bisa lebih dari satu)", type=["csv"], accept_multiple_files=True)
+    n_uut = st.sidebar.number_input("Jumlah UUT", min_value=1, max_value=MAX_UUT, value=1, key="n_uut")
+    for i in range(int(n_uut)):
+        #UUT pertama memakai key widget lama, UUT berikutnya diberi akhiran "-2", "-3", ...
+        suffix = "" if i == 0 else f"-{i+1}"
+        label = "" if i == 0 else f" {i+1}"
+        id_logger = st.sidebar.selectbox(f"Jenis Logger UUT{label}", options= list(UUT_LOGGER), key=f"logger{suffix}")
+        uut_file = st.sidebar.file_uploader(f"Upload CSV UUT{label}", type=["csv"], key=f"uut_file{suffix}")
+        uut_id = None
+        if uut_file:
+            #ID unit menjadi kunci arsip; nama file saja tidak unik (mis. CR1000X_Table1.csv)
+            stem = os.path.splitext(uut_file.name)[0]
+            uut_id = st.sidebar.text_input(f"ID UUT/stasiun{label}", value=stem, key=f"uut_id{suffix}-{uut_file.name}").strip() or stem
+        uut_inputs.append((suffix, label, id_logger, uut_file, uut_id))
+else:
+    #Data yang sudah pernah disimpan dibaca langsung dari arsip per rentang tanggal
+    arsip_uut = st.sidebar.multiselect("UUT dari arsip", STORE.units("uut"), max_selections=MAX_UUT, key="arsip_uut")
+    std_bounds = STORE.time_bounds("standar", id_std)
+    if std_bounds is None:
+        st.sidebar.warning(f"Belum ada data standar {id_std} di arsip.")
+    else:
+        arsip_mulai = st.sidebar.date_input("Tanggal mulai", value=std_bounds[0].date(), key="arsip_mulai")
+        arsip_selesai = st.sidebar.date_input("Tanggal selesai", value=std_bounds[1].date(), key="arsip_selesai")
+    with st.sidebar.expander("Riwayat tabel koreksi"):
+        st.dataframe(STORE.correction_history(), hide_index=True)
 
 st.sidebar.markdown("---")
+#Waktu per tahap selalu dicatat ke log profiling, memori hanya diukur saat panel aktif
+debug_panel = st.sidebar.toggle("🐞 Panel profiling", key="debug_panel")
+profiler = StageProfiler(trace_memory=debug_panel)
 if st.sidebar.button("❌ Shutdown Aplikasi"):
     st.sidebar.warning("🚨 Aplikasi akan dihentikan...")
     st.stop()  # Menghentikan eksekusi Streamlit (opsional)
     os._exit(0)  # Menghentikan proses Python
 
-if standard_files and uut_file:
-    df_standard_list = [pd.read_csv(f, sep=None, engine='python') for f in standard_files]
-    df_standard = pd.DataFrame()
-    
-    #Cleaning data setiap file
-    for df in df_standard_list:
-        clean_df = clean_std_df(df)
-        df_standard = pd.concat([df_standard,clean_df], ignore_index=True)
-
-    std_df_cols = df_standard.columns
-    status_std_cols = [col for col in std_df_cols if col.lower().startswith("stat")]
-
-    #Logger UUT
-    if id_logger == "CS":
-        df_uut = pd.read_csv(uut_file,sep=None, engine='python', skiprows=1, header=0)
-        df_uut = df_uut.drop([0,1])
-    else:
-        df_uut = pd.read_csv(uut_file,sep=None, engine='python')
-        
-    df_uut.dropna(axis=1, how='all').reset_index(drop=True)
-
-    # exclude kolom TIMESTAMP dan RECORD dari konversi
-    if id_logger == "CS":
-        exclude_cols_uut = [df_uut.columns[:1],"RECORD"]
-    else:
-        exclude_cols_uut = df_uut.columns[:2]
-    
-    df_uut = convert_columns_to_float(df_uut, exclude_cols_uut)
-
+units = []
+invalid_counts = {}
+if standard_files and uut_inputs and all(uut_file for _, _, _, uut_file, _ in uut_inputs):
+    std_digests = tuple(file_digest(f) for f in standard_files)
+    with profiler.stage("muat standar") as rec:
+        df_standard, invalid_counts = cached_standard(std_digests, standard_files, profiler)
+        rec["baris"] = len(df_standard)
+
+    for suffix, label, id_logger, uut_file, uut_id in uut_inputs:
+        uut_digest = file_digest(uut_file)
+        name = uut_id if len(uut_inputs) == 1 else f"UUT{label} - {uut_id}"
+        with profiler.stage("muat UUT", uut=name) as rec:
+            df_uut = cached_uut(uut_digest, id_logger, uut_file, profiler)
+            rec["baris"] = len(df_uut)
+        units.append({"suffix": suffix, "label": label, "name": name, "uut_id": uut_id, "logger": id_logger, "digest": uut_digest, "df_uut": df_uut})
+elif arsip_uut and std_bounds is not None:
+    arsip_start, arsip_end = datetime.combine(arsip_mulai, time.min), datetime.combine(arsip_selesai, time.max)
+    std_digests = (STORE.version("standar", id_std, arsip_start, arsip_end),)
+    with profiler.stage("muat standar (arsip)") as rec:
+        df_standard = cached_store_range("standar", id_std, arsip_start, arsip_end, std_digests[0])
+        rec["baris"] = len(df_standard)
+    for i, uut_id in enumerate(arsip_uut):
+        suffix = "" if i == 0 else f"-{i+1}"
+        label = "" if i == 0 else f" {i+1}"
+        uut_digest = STORE.version("uut", uut_id, arsip_start, arsip_end)
+        with profiler.stage("muat UUT (arsip)", uut=uut_id) as rec:
+            df_uut = cached_store_range("uut", uut_id, arsip_start, arsip_end, uut_digest)
+            rec["baris"] = len(df_uut)
+        name = uut_id if len(arsip_uut) == 1 else f"UUT{label} - {uut_id}"
+        units.append({"suffix": suffix, "label": label, "name": name, "uut_id": uut_id, "logger": STORE.meta("uut", uut_id).get("logger"),
+                      "digest": uut_digest, "df_uut": df_uut})
+    if df_standard.empty or any(unit["df_uut"].empty for unit in units):
+        st.warning("⚠️ Tidak ada data arsip standar/UUT pada rentang tanggal tersebut.")
+        units = []
+
+if units:
     st.subheader("📋 Pratinjau Data")
     st.write("### Data Alat Standar")
-    st.dataframe(df_standard.head())
-    st.write("### Data UUT")
-    st.dataframe(df_uut.head())
+    st.dataframe(decimal_floats(df_standard.head()))
+    if invalid_counts:
+        with st.expander("Jumlah data INVALID yang dihapus per sensor"):
+            st.dataframe(pd.DataFrame({"Sensor": list(invalid_counts.keys()), "Baris INVALID": list(invalid_counts.values())}), hide_index=True)
+    for unit in units:
+        st.write(f"### Data UUT{unit['label']}")
+        st.dataframe(decimal_floats(unit["df_uut"].head()))
 
     #Inisialisasi header
     std_headers = df_standard.columns.tolist()
-    uut_headers = df_uut.columns.tolist()
 
     # --- Konversi Timestamp ---
     st.subheader("🕒 Sinkronisasi Waktu")
@@ -193,25 +315,44 @@ if standard_files and uut_file:
         col_t_std, col_t_uut = st.columns(2)
 
         ts_col_std = col_t_std.selectbox("Pilih kolom timestamp alat standar", std_headers)
-        ts_col_uut = col_t_uut.selectbox("Pilih kolom timestamp UUT", uut_headers)
+        for unit in units:
+            unit["ts_col"] = col_t_uut.selectbox(f"Pilih kolom timestamp UUT{unit['label']}", unit["df_uut"].columns.tolist(), key=f"ts_uut{unit['suffix']}")
+        resample_label = col_t_std.selectbox("Resolusi data sebelum digabung", list(RESAMPLE_RULES), key="resample_rule")
+        resample_how = col_t_uut.selectbox("Agregasi", list(RESAMPLE_METHODS), key="resample_how")
+        resample_rule, resample_how = RESAMPLE_RULES[resample_label], RESAMPLE_METHODS[resample_how]
 
+    timestamps_ok = False
     try:
-        df_standard[ts_col_std] = pd.to_datetime(df_standard[ts_col_std], format="%m/%d/%y %I:%M:%S %p", errors='coerce')
-        df_uut[ts_col_uut] = pd.to_datetime(df_uut[ts_col_uut], errors='coerce')
-
-        # Hapus baris dengan timestamp yang gagal dikonversi
-        df_standard = df_standard.dropna(subset=[ts_col_std])
-        df_uut = df_uut.dropna(subset=[ts_col_uut])
+        with profiler.stage("konversi timestamp"):
+            df_standard = cached_std_timestamps(std_digests, ts_col_std, df_standard)
+            for unit in units:
+                unit["df_uut"] = cached_uut_timestamps(unit["digest"], unit["logger"], unit["ts_col"], unit["df_uut"])
 
         st.success("✅ Timestamp berhasil dikonversi.")
+        timestamps_ok = True
     except Exception as e:
         st.error(f"❌ Gagal mengonversi waktu: {e}")
 
+    if timestamps_ok and sumber == SUMBER_UPLOAD and st.button("💾 Simpan ke arsip kampanye", key="simpan_arsip"):
+        if len({unit["uut_id"] for unit in units}) < len(units):
+            st.error("❌ ID UUT/stasiun harus berbeda untuk setiap UUT sebelum disimpan ke arsip.")
+        else:
+            try:
+                with st.spinner("Menyimpan ke arsip..."), profiler.stage("simpan arsip"):
+                    n_std = STORE.ingest("standar", id_std, df_standard, ts_col_std)
+                    for unit in units:
+                        STORE.ingest("uut", unit["uut_id"], unit["df_uut"], unit["ts_col"], logger=unit["logger"])
+                    STORE.save_corrections(REGISTRY)
+                st.success(f"✅ {n_std} baris data standar {id_std} (baru/diperbarui) dan {len(units)} UUT tersimpan di arsip `{STORE.root}`.")
+            except (OSError, ValueError, pa.ArrowException) as e:
+                st.error(f"❌ Gagal menyimpan ke arsip kampanye `{STORE.root}`: {e}")
+
     #Pemetaan header
     status_cols = [col for col in df_standard.columns if col.lower().startswith("stat")]   
     exclude_options_std = status_cols + [ts_col_std]
     option_std = list(filter(lambda x: x not in exclude_options_std, std_headers))
-    option_uut = list(filter(lambda x: x != ts_col_uut, uut_headers))
+    for unit in units:
+        unit["options"] = [col for col in unit["df_uut"].columns if col != unit["ts_col"]]
 
 
     # --- Pembersihan Header ---
@@ -222,280 +363,221 @@ if standard_files and uut_file:
             df_standard = df_standard.drop(columns=cols_to_drop)
             option_std = [col for col in option_std if col not in cols_to_drop]
         
-        cols_uut_drop = st.multiselect("Pilih kolom UUT yang tidak akan digunakan", option_uut)
-        if cols_uut_drop:
-            df_uut = df_uut.drop(columns=cols_uut_drop)
-            option_uut = [col for col in option_uut if col not in cols_uut_drop]
+        for unit in units:
+            unit["cols_drop"] = st.multiselect(f"Pilih kolom UUT{unit['label']} yang tidak akan digunakan", unit["options"], key=f"uut_drop{unit['suffix']}")
+            if unit["cols_drop"]:
+                unit["df_uut"] = unit["df_uut"].drop(columns=unit["cols_drop"])
+                unit["options"] = [col for col in unit["options"] if col not in unit["cols_drop"]]
 
     # --- Header Mapping ---
     st.subheader("🔀 Mapping Header untuk Perbandingan")
-
-    header_mapping = {}
-    params_mapping = {}
-    
-    col_t,col_rh= st.columns(2)
-    col_t.subheader("🌡Suhu Udara")
-    tt_std = col_t.selectbox(f"Header Suhu Standar", ["-"] + option_std, key="tt_std")
-    tt_uut = col_t.selectbox(f"Header Suhu UUT",["-"] + option_uut, key="tt_uut")
-    if tt_std != "-" and tt_uut != "-":
-        header_mapping[tt_std] = tt_uut
-        params_mapping["Suhu"] = [tt_std,tt_uut,"TT"]
-        df_standard[f"koreksi-{tt_std}"] = df_standard[tt_std].apply(lambda x: cari_koreksi_scipy(id_std, "TT", x))
-        df_standard[f"TT STD-terkoreksi"] = df_standard[tt_std] + df_standard[f"koreksi-{tt_std}"]
-
-    col_rh.subheader("💦 Kelembapan")
-    rh_std = col_rh.selectbox(f"Header Kelembapan Standar",["-"] + option_std, key="rh_std")
-    rh_uut = col_rh.selectbox(f"Header Kelembapan UUT",["-"] + option_uut, key="rh_uut")
-    if rh_std != "-" and rh_uut != "-":
-        header_mapping[rh_std] = rh_uut
-        params_mapping["Kelembapan"] = [rh_std,rh_uut,"RH"]
-        df_standard[f"koreksi-{rh_std}"] = df_standard[rh_std].apply(lambda x: cari_koreksi_scipy(id_std, "RH", x))
-        df_standard[f"RH STD-terkoreksi"] = df_standard[rh_std] + df_standard[f"koreksi-{rh_std}"]
-
-    col_p,col_ws = st.columns(2)
-    col_p.subheader("🎈 Tekanan")
-    pp_std = col_p.selectbox(f"Header Tekanan Standar",["-"] + option_std, key="pp_std")
-    pp_uut = col_p.selectbox(f"Header Tekanan UUT",["-"] + option_uut, key="pp_uut")
-    konversi_pp = col_p.checkbox("Konversi satuan UUT InHg ke hPa", value=False)
-    if pp_std != "-" and pp_uut != "-":
-        header_mapping[pp_std] = pp_uut
-        params_mapping["Tekanan"] = [pp_std,pp_uut,"PP"]
-        df_standard[f"koreksi-{pp_std}"] = df_standard[pp_std].apply(lambda x: cari_koreksi_scipy(id_std, "PP", x))
-        df_standard[f"PP STD-terkoreksi"] = df_standard[pp_std] + df_standard[f"koreksi-{pp_std}"]
-        if konversi_pp:
-            df_uut[pp_uut] = df_uut[pp_uut].apply(lambda x: convert_unit(x, "InHg", "hPa"))
-    
-    col_ws.subheader("🍃 Kecepatan Angin")
-    ws_std = col_ws.selectbox(f"Header Kec. Angin Standar",["-"] + option_std, key="ws_std")
-    ws_uut = col_ws.selectbox(f"Header Kec. Angin UUT",["-"] + option_uut, key="ws_uut")
-    konversi_ws = col_ws.checkbox("Konversi satuan UUT knot ke m/s", value=False)
-    if ws_std != "-" and ws_uut != "-":
-        header_mapping[ws_std] = ws_uut
-        params_mapping["Kecepatan Angin"] = [ws_std,ws_uut,"WS"]
-        df_standard[f"koreksi-{ws_std}"] = df_standard[ws_std].apply(lambda x: cari_koreksi_scipy(id_std, "WS", x))
-        df_standard[f"WS STD-terkoreksi"] = df_standard[ws_std] + df_standard[f"koreksi-{ws_std}"]
-        if konversi_ws:
-            df_uut[ws_uut] = df_uut[ws_uut].apply(lambda x: convert_unit(x, "knot", "m/s"))
-    
-    col_wd,col_sr = st.columns(2)
-    col_wd.subheader("🌬 Arah Angin")
-    wd_std = col_wd.selectbox(f"Header Arah Angin Standar",["-"] + option_std, key="wd_std")
-    wd_uut = col_wd.selectbox(f"Header Arah Angin UUT",["-"] + option_uut, key="wd_uut")
-    if wd_std != "-" and wd_uut != "-":
-        header_mapping[wd_std] = wd_uut
-        params_mapping["Arah Angin"] = [wd_std,wd_uut,"WD"]
-        df_standard[f"koreksi-{wd_std}"] = df_standard[wd_std].apply(lambda x: cari_koreksi_scipy(id_std, "WD", x))
-        df_standard[f"WD STD-terkoreksi"] = df_standard[wd_std] + df_standard[f"koreksi-{wd_std}"]
-    
-    col_sr.subheader("☀️ Radiasi Matahari")
-    sr_std = col_sr.selectbox(f"Header Radiasi Matahari Standar",["-"] + option_std, key="sr_std")
-    sr_uut = col_sr.selectbox(f"Header Radiasi Matahari UUT",["-"] + option_uut, key="sr_uut")
-    if sr_std != "-" and sr_uut != "-":
-        header_mapping[sr_std] = sr_uut
-        params_mapping["Radiasi Matahari"] = [sr_std,sr_uut,"SR"]
-        df_standard[f"SR STD-terkoreksi"] = df_standard[sr_std]
-
-    col_wt,col_wpanci = st.columns(2)
-    col_wt.subheader("🌊 Suhu Air")
-    tw_std = col_wt.selectbox(f"Header Suhu Air Standar",["-"] + option_std, key="tw_std")
-    tw_uut = col_wt.selectbox(f"Header Suhu Air UUT",["-"] + option_uut, key="tw_uut")
-    if tw_std != "-" and tw_uut != "-":
-        header_mapping[tw_std] = tw_uut
-        params_mapping["Suhu Air"] = [tw_std,tw_uut,"WT"]
-        df_standard[f"koreksi-{tw_std}"] = df_standard[tw_std].apply(lambda x: cari_koreksi_scipy(id_std, "WT", x))
-        df_standard[f"WT STD-terkoreksi"] = df_standard[tw_std] + df_standard[f"koreksi-{tw_std}"]
-    
-    col_wpanci.subheader("🍃 Kec. Angin Panci")
-    wpanci_std = col_wpanci.selectbox(f"Header Suhu Air Standar",["-"] + option_std, key="wpanci_std")
-    wpanci_uut = col_wpanci.selectbox(f"Header Suhu Air UUT",["-"] + option_uut, key="wpanci_uut")
-    if wpanci_std != "-" and wpanci_uut != "-":
-        header_mapping[wpanci_std] = wpanci_uut
-        params_mapping["Kec. Angin Panci"] = [wpanci_std,wpanci_uut,"OVA"]
-        df_standard[f"koreksi-{wpanci_std}"] = df_standard[wpanci_std].apply(lambda x: cari_koreksi_scipy(id_std, "WS", x))
-        df_standard[f"OVA STD-terkoreksi"] = df_standard[wpanci_std] + df_standard[f"koreksi-{wpanci_std}"]
+    unit_containers = st.tabs([unit["name"] for unit in units]) if len(units) > 1 else [st.container()]
+    for unit, container in zip(units, unit_containers):
+        with container:
+            unit["header_mapping"], unit["params_mapping"], unit["unit_conversions"] = mapping_widgets(option_std, unit["options"], unit["suffix"])
 
 
     # --- Sinkronisasi Timestamp dan Gabung ---
-    df_standard_sorted = df_standard.sort_values(ts_col_std)
-    df_uut_sorted = df_uut.sort_values(ts_col_uut)
-    df_merged = pd.merge_asof(
-        df_standard_sorted,
-        df_uut_sorted,
-        left_on=ts_col_std,
-        right_on=ts_col_uut,
-        direction='nearest',
-        tolerance=pd.Timedelta('1min')
-    )
-
-    # Hapus baris yang memiliki nilai kosong pada kolom hasil mapping
-    cols_to_check = list(header_mapping.keys()) + list(header_mapping.values())
-    df_merged = df_merged.dropna(subset=cols_to_check).reset_index(drop=True)
-
-    time_list = df_merged[ts_col_std]
+    #Koreksi standar dikelompokkan per mapping kolom standar agar tidak dihitung ulang per UUT
+    def standard_side(params_mapping):
+        return tuple((param_key, std_col, par_code) for param_key, (std_col, _, par_code) in params_mapping.items())
+
+    def merge_unit(unit):
+        params_mapping = unit["params_mapping"]
+        correction_key = (std_digests, ts_col_std, tuple(cols_to_drop), standard_side(params_mapping), id_std, REGISTRY.digest,
+                          resample_rule, resample_how)
+        df_corrected = cached_corrected_standard(correction_key, df_standard, params_mapping, ts_col_std, id_std, resample_rule, resample_how, profiler)
+        merge_key = correction_key + (
+            unit["digest"], unit["logger"], unit["ts_col"], tuple(unit["cols_drop"]),
+            tuple((k, tuple(v)) for k, v in params_mapping.items()), tuple(unit["unit_conversions"].items()),
+        )
+        with profiler.stage("gabung UUT", uut=unit["name"]) as rec:
+            df_merged = cached_merge(merge_key, df_corrected, unit["df_uut"], ts_col_std, unit["ts_col"], params_mapping,
+                                     unit["header_mapping"], unit["unit_conversions"], resample_rule, resample_how, profiler)
+            rec["baris"] = len(df_merged)
+        return merge_key, df_merged
+
+    #Standar yang sama dikoreksi dulu sekali, lalu join tiap UUT berjalan paralel
+    for side in dict.fromkeys(standard_side(unit["params_mapping"]) for unit in units):
+        params_mapping = next(unit["params_mapping"] for unit in units if standard_side(unit["params_mapping"]) == side)
+        correction_key = (std_digests, ts_col_std, tuple(cols_to_drop), side, id_std, REGISTRY.digest, resample_rule, resample_how)
+        with profiler.stage("standar terkoreksi"):
+            cached_corrected_standard(correction_key, df_standard, params_mapping, ts_col_std, id_std, resample_rule, resample_how, profiler)
+    with ThreadPoolExecutor(max_workers=len(units)) as executor:
+        for unit, (merge_key, df_merged) in zip(units, executor.map(merge_unit, units)):
+            unit["merge_key"], unit["df_merged"] = merge_key, df_merged
+
+    time_list = pd.concat([unit["df_merged"][ts_col_std] for unit in units]).sort_values()
     if len(time_list) != 0 :
         st.subheader("🕒 Rentang Data")
         st.write("Pilih rentang waktu")
-        available_times = df_merged[ts_col_std].dt.strftime('%H:%M').unique().tolist()
+        available_times = time_list.dt.strftime('%H:%M').unique().tolist()
         #st.write(available_times)
         col_t1,col_t2 = st.columns(2)
         start_date = col_t1.date_input("Tanggal mulai:",value= time_list.min().date(), min_value=time_list.min().date(), max_value=time_list.max().date())
         start_time = col_t2.selectbox("Pilih waktu", available_times, key="start_time")
 
-        end_date = col_t1.date_input("Tanggal selesai:", value=df_merged[ts_col_std].max().date(), min_value=time_list.min().date(), max_value=time_list.max().date())
+        end_date = col_t1.date_input("Tanggal selesai:", value=time_list.max().date(), min_value=time_list.min().date(), max_value=time_list.max().date())
         end_time = col_t2.selectbox("Pilih waktu", available_times,index=len(available_times)-1, key="end_time")
 
         start_datetime = datetime.strptime(f"{start_date} {start_time}", "%Y-%m-%d %H:%M")
         end_datetime = datetime.strptime(f"{end_date} {end_time}", "%Y-%m-%d %H:%M")
-        df_merged_filtered = df_merged[(df_merged[ts_col_std] >= start_datetime)&((df_merged[ts_col_std] <= end_datetime))].reset_index(drop=True)
+
+        mapped_units = [unit for unit in units if unit["header_mapping"]]
+        if mapped_units:
+            with st.expander("🔎 Rekomendasi rentang stabil"):
+                col_w1, col_w2 = st.columns(2)
+                durasi = col_w1.number_input("Panjang rentang (menit)", min_value=1, value=30, step=5, key="durasi_stabil")
+                n_best = col_w2.number_input("Jumlah rekomendasi", min_value=1, max_value=20, value=5, key="n_stabil")
+                acuan = mapped_units[0]
+                if len(mapped_units) > 1:
+                    nama_acuan = st.selectbox("UUT acuan", [unit["name"] for unit in mapped_units], key="uut_acuan")
+                    acuan = next(unit for unit in mapped_units if unit["name"] == nama_acuan)
+                engine = cached_window_stats(acuan["merge_key"], acuan["df_merged"], acuan["params_mapping"], ts_col_std, profiler)
+                with profiler.stage("rekomendasi rentang stabil"):
+                    rekomendasi, alasan = find_stable_windows(engine, pd.Timedelta(minutes=durasi), n_best)
+                if alasan is not None:
+                    st.info(alasan)
+                else:
+                    st.dataframe(rekomendasi)
+                    pilihan = [f"{row.Mulai:%Y-%m-%d %H:%M} - {row.Selesai:%Y-%m-%d %H:%M}" for row in rekomendasi.itertuples()]
+                    dipakai = st.selectbox("Gunakan rentang", ["Manual"] + pilihan, key="rentang_stabil")
+                    if dipakai != "Manual":
+                        row = rekomendasi.iloc[pilihan.index(dipakai)]
+                        start_datetime, end_datetime = row["Mulai"].to_pydatetime(), row["Selesai"].to_pydatetime()
         st.write(f'ℹ️ Data dipilih mulai {start_datetime} sampai {end_datetime}')
-        #st.dataframe(df_merged_filtered)
 
     st.subheader("📊 Hasil Kalibrasi Sementara per Parameter")
-    if len(header_mapping) != 0:
-        # if "lhks_df" not in st.session_state:
-        #     st.session_state.lhks_df = []
-        lhks_df = pd.DataFrame()
-        report_rows = []
-        params_keys = list(params_mapping.keys())
-        params_items = list(params_mapping.items())
-        tabs = st.tabs(params_keys)
-        count = 0
-        #membuat tampilan tab per parameter
-        for tab, param_key in zip(tabs,params_keys):
-            with tab:
-                std_col = params_mapping[param_key][0]
-                uut_col = params_mapping[param_key][1]
-                par_code = params_mapping[param_key][2]
-                if std_col in df_merged_filtered.columns and uut_col in df_merged_filtered.columns:
-                    tab.write(f"### Perbandingan data {param_key} ({std_col} vs {uut_col})")
-
-                    if (param_key == "Kecepatan Angin"):
-                        df_merged_filtered[f"koreksi_{uut_col}"] = (df_merged_filtered[f"{par_code} STD-terkoreksi"] - df_merged_filtered[uut_col] + 180) % 360 -180
-                    elif (param_key == "Radiasi Matahari"):
-                        df_merged_filtered[f"koreksi_{uut_col}"] = np.where(df_merged_filtered[uut_col] < 100, np.nan,  df_merged_filtered[f"{par_code} STD-terkoreksi"] / df_merged_filtered[uut_col])
-                        # df_merged_filtered[f"f-koreksi_{uut_col}"] = df_merged_filtered[f"{par_code} STD-terkoreksi"] / df_merged_filtered[uut_col]
-                    else:
-                        df_merged_filtered[f"koreksi_{uut_col}"] = df_merged_filtered[f"{par_code} STD-terkoreksi"] - df_merged_filtered[uut_col]
-                   
-                    
-                    rerata_std = df_merged_filtered[f'{par_code} STD-terkoreksi'].mean()
-                    rerata_uut = df_merged_filtered[uut_col].mean()
-                    koreksi = df_merged_filtered[f'koreksi_{uut_col}'].mean()
-                    stdev_kor = df_merged_filtered[f'koreksi_{uut_col}'].std() 
-                    report_rows.append({
-                        "Parameter":param_key,
-                        "Standar":f"{rerata_std:.2f}",
-                        "UUT":f"{rerata_uut:.2f}",
-                        "Koreksi":f"{koreksi:.2g}",
-                        "STDEV":f"{stdev_kor:.2g}"
-                    })
-                   
-                    col1, col2, col3 = tab.columns(3)
-                    col1.metric(f"Rata-rata Standar", f"{rerata_std:.2f}",f"{df_merged_filtered[f'{par_code} STD-terkoreksi'].std():.2g}", border=True)
-                    col2.metric(f"Rata-rata UUT", f"{rerata_uut:.2f}", f"{df_merged_filtered[uut_col].std():.2g}", border=True)
-                    col3.metric(f"Koreksi", f"{koreksi:.2g}",f"{stdev_kor:.2g}",border=True)
-
-                    tab.line_chart(
-                        df_merged_filtered, 
-                        x=ts_col_std, 
-                        y=[f"{par_code} STD-terkoreksi",uut_col],
-                        )
-                    
-                    #Buat Unduhan untuk Grafik
-                    fig, ax = plt.subplots(figsize=(15, 7))
-                    sns.lineplot(x=df_merged_filtered[ts_col_std], y=df_merged_filtered[f"{par_code} STD-terkoreksi"], label=f"{par_code} Standar", ax=ax, linewidth=2.5)
-                    sns.lineplot(x=df_merged_filtered[ts_col_std], y=df_merged_filtered[uut_col], label=f"{par_code} UUT", ax=ax, linewidth=2.5)
-
-                    ax.set_title(f" Grafik Tren {param_key} Standar vs UUT")
-                    ax.legend()
-                    ax.grid(True)
-                    plt.xticks(rotation=45)
-                    #st.pyplot(fig)
-                 
-                    # Konversi DataFrame ke CSV string
-                    if std_col.lower().startswith("sr"):
-                        df_summary = df_merged_filtered[[ts_col_std, f"{std_col}", uut_col, f"koreksi_{uut_col}"]].copy()
-                    else:
-                        df_summary = df_merged_filtered[[ts_col_std, f"{std_col}",f"koreksi-{std_col}",f"{par_code} STD-terkoreksi", uut_col, f"koreksi_{uut_col}"]].copy()
-
-                    buf = io.BytesIO()
-                    fig.savefig(buf, format="png")
-                    buf.seek(0)
-
-                    csv_buffer = io.BytesIO()
-                    with pd.ExcelWriter(csv_buffer, engine='openpyxl') as writer:
-                        df_summary.to_excel(writer, index=False, sheet_name='Data')
-                        csv_buffer.seek(0)
-                
-                    # Tombol download
-                    col_btn1,col_btn2,spacer = tab.columns([1, 1, 3])
-                    with col_btn1:
-                        col_btn1.download_button(label="📈 Unduh Grafik",data=buf,file_name=f"grafik_tren_{uut_col}.png",mime="image/png", key=f'excel-{std_col}')
-                    with col_btn2:
-                        col_btn2.download_button(label="📄 Unduh Tabel", data=csv_buffer, file_name=f"data-komparasi-{uut_col}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", key=f'data-{std_col}')
-
-                    with tab.expander("Lihat tabel komparasi"):
-                        st.dataframe(df_summary)
-
-                    #Himpun df_summary
-                    if count > 0:
-                        cut_time = df_summary.drop(columns='Timestamp')
-                        lhks_df= pd.concat([lhks_df,cut_time],axis=1) 
-                    else:
-                        #df_summary = df_summary.add_suffix(f'_{count}')
-                        df_summary = df_summary
-                        lhks_df= pd.concat([lhks_df,df_summary],axis=1) 
-                    count += 1    
-                    # st.write(count) 
+    mapped_units = [unit for unit in units if unit["header_mapping"]]
+    if mapped_units:
+        def compare_unit(unit):
+            #Statistik jendela waktu, tabel komparasi dan data grafik satu UUT
+            with profiler.stage("filter rentang", uut=unit["name"]) as rec:
+                df_merged_filtered = filter_time_range(unit["df_merged"], ts_col_std, start_datetime, end_datetime)
+                rec["baris"] = len(df_merged_filtered)
+            engine = cached_window_stats(unit["merge_key"], unit["df_merged"], unit["params_mapping"], ts_col_std, profiler)
+            with profiler.stage("statistik per parameter", uut=unit["name"]):
+                window_stats = engine.parameter_stats(start_datetime, end_datetime)
+                results, lhks_df, report_df = run_comparison(df_merged_filtered, unit["params_mapping"], ts_col_std, window_stats)
+            with profiler.stage("data grafik", uut=unit["name"]):
+                series = plot_series(df_merged_filtered, ts_col_std, unit["params_mapping"])
+            return df_merged_filtered, results, lhks_df, report_df, series
+
+        with ThreadPoolExecutor(max_workers=len(mapped_units)) as executor:
+            for unit, outputs in zip(mapped_units, executor.map(compare_unit, mapped_units)):
+                unit["df_merged_filtered"], unit["results"], unit["lhks_df"], unit["report_df"], unit["series"] = outputs
+
+        unit_containers = st.tabs([unit["name"] for unit in mapped_units]) if len(mapped_units) > 1 else [st.container()]
+        for unit, container in zip(mapped_units, unit_containers):
+            suffix, params_mapping, results = unit["suffix"], unit["params_mapping"], unit["results"]
+            df_merged_filtered, series = unit["df_merged_filtered"], unit["series"]
+            data_key = (unit["merge_key"], str(start_datetime), str(end_datetime))
+            params_keys = list(params_mapping.keys())
+            tabs = container.tabs(params_keys)
+            #membuat tampilan tab per parameter
+            for tab, param_key in zip(tabs,params_keys):
+                with tab:
+                    std_col, uut_col, par_code = params_mapping[param_key]
+                    if param_key in results:
+                        stats, df_summary = results[param_key]
+                        tab.write(f"### Perbandingan data {param_key} ({std_col} vs {uut_col})")
+
+                        col1, col2, col3 = tab.columns(3)
+                        col1.metric(f"Rata-rata Standar", f"{stats['rerata_std']:.2f}",f"{stats['stdev_std']:.2g}", border=True)
+                        col2.metric(f"Rata-rata UUT", f"{stats['rerata_uut']:.2f}", f"{stats['stdev_uut']:.2g}", border=True)
+                        col3.metric(f"Koreksi", f"{stats['koreksi']:.2g}",f"{stats['stdev_kor']:.2g}",border=True)
+                        tab.caption(f"Jumlah data: {stats['jumlah']}")
+
+                        #Grafik interaktif memakai data tereduksi, rentang zoom menentukan kerapatan titik
+                        chart_cols = [f"{par_code} STD-terkoreksi",uut_col]
+                        t_min, t_max = df_merged_filtered[ts_col_std].min(), df_merged_filtered[ts_col_std].max()
+                        zoom = (t_min, t_max)
+                        if t_min < t_max:
+                            zoom = tab.slider("Zoom grafik", min_value=t_min.to_pydatetime(), max_value=t_max.to_pydatetime(),
+                                              value=(t_min.to_pydatetime(), t_max.to_pydatetime()), format="DD/MM/YY HH:mm", key=f"zoom-{std_col}{suffix}")
+                        tab.line_chart(
+                            level_of_detail(df_merged_filtered[[ts_col_std] + chart_cols], ts_col_std, chart_cols, *zoom),
+                            x=ts_col_std, 
+                            y=chart_cols,
+                            )
+
+                        # Tombol download, grafik dan tabel baru dibuat saat diminta
+                        col_btn1,col_btn2,spacer = tab.columns([1, 1, 3])
+                        with col_btn1:
+                            lazy_download(col_btn1, "📈 Unduh Grafik", f"png-{std_col}{suffix}", data_key,
+                                          lambda: trend_png(series[param_key], ts_col_std, param_key, uut_col, par_code),
+                                          f"grafik_tren_{uut_col}.png", "image/png")
+                        with col_btn2:
+                            fmt = col_btn2.selectbox("Format tabel", list(EXPORT_FORMATS), key=f"fmt-{std_col}{suffix}")
+                            lazy_download(col_btn2, "📄 Unduh Tabel", f"data-{std_col}{suffix}", data_key + (fmt,),
+                                          lambda: export_bytes(df_summary, fmt, 'Data'),
+                                          f"data-komparasi-{uut_col}.{fmt}", EXPORT_FORMATS[fmt])
+
+                        with tab.expander("Lihat tabel komparasi"):
+                            st.dataframe(df_summary, column_config=float32_column_config(df_summary))
         
         #Membuat Dataframe Gabungan
         st.subheader("📊 Hasil Kalibrasi Sementara Gabungan")
         now_stamp = datetime.now().strftime('%d%m%Y-%H%M%S')
-        summary_buffer = io.BytesIO()
-        with pd.ExcelWriter(summary_buffer, engine='openpyxl') as writer:
-                lhks_df.to_excel(writer, index=False, sheet_name='Data Gabungan')
-                summary_buffer.getvalue()
-
-        #Memuat tempalte laporan
-        report_df = pd.DataFrame(report_rows)
-        html_template = open("report.html").read()
-        template = Template(html_template)
-
-        plots_base64 = []
-
-        for param in params_keys:
-            param_item = params_mapping[param]
-            report_fig = plot_parameter(lhks_df,param,param_item[0],param_item[1])
-            # st.pyplot(report_fig)
-            img = convertPlotToBase64(report_fig)
-            plots_base64.append(f"data:image/png;base64,{img}")
-
-        # st.session_state["html_out"] = html_out
 
         with st.expander("Klik untuk mengunduh data gabungan"):
             filename = st.text_input("Mau dinamain apa filenya?")
             if filename != '':
-                html_out = template.render(
-                            subtitle = filename,
-                            info = f'Periode sampling: {start_datetime} sampai {end_datetime} | Alat Standar: {id_std}',
-                            summary_table=report_df.to_html(index=False),
-                            plots=plots_base64
-                        )
-                
-                col_d_btn1,col_d_btn2,d_spacer = st.columns([1, 2, 1])
-                with col_d_btn1:
-                        col_d_btn1.download_button(label="📄 Unduh File", data=summary_buffer, file_name=f"{now_stamp}-{filename}.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+                def build_report():
+                    #Laporan memuat satu tabel ringkasan per UUT, template dan gambar di-cache di modul report
+                    with profiler.stage("grafik laporan"):
+                        if len(mapped_units) > 1:
+                            plots_base64 = {unit["name"]: report_plots(unit["series"], unit["params_mapping"], unit["name"]) for unit in mapped_units}
+                        else:
+                            plots_base64 = report_plots(mapped_units[0]["series"], mapped_units[0]["params_mapping"])
+                    with profiler.stage("render HTML"):
+                        html_out = render_report(
+                                    load_template("report.html"),
+                                    subtitle = filename,
+                                    info = f'Periode sampling: {start_datetime} sampai {end_datetime} | Alat Standar: {id_std}',
+                                    report_df = {unit["name"]: unit["report_df"] for unit in mapped_units} if len(mapped_units) > 1 else mapped_units[0]["report_df"],
+                                    plots_base64 = plots_base64
+                                )
+                    return io.BytesIO(html_out.encode())
+
+                col_d_btn1,col_d_btn2,col_d_btn3 = st.columns([1, 2, 1])
+                for unit in mapped_units:
+                    suffix, lhks_df, df_merged_filtered = unit["suffix"], unit["lhks_df"], unit["df_merged_filtered"]
+                    data_key = (unit["merge_key"], str(start_datetime), str(end_datetime))
+                    nama_file = filename if len(mapped_units) == 1 else f"{filename}-{unit['name']}"
+                    with col_d_btn1:
+                            fmt_gabungan = col_d_btn1.selectbox(f"Format data gabungan{unit['label']}", list(EXPORT_FORMATS), key=f"fmt-gabungan{suffix}")
+                            if fmt_gabungan == "xlsx" and len(lhks_df) >= EXCEL_MAX_ROWS:
+                                col_d_btn1.caption("Data melebihi batas baris Excel, akan dipecah ke beberapa sheet. Pertimbangkan CSV/Parquet.")
+                            lazy_download(col_d_btn1, f"📄 Unduh File{unit['label']}", f"data-gabungan{suffix}", data_key + (fmt_gabungan,),
+                                          lambda: export_bytes(lhks_df, fmt_gabungan, 'Data Gabungan'),
+                                          f"{now_stamp}-{nama_file}.{fmt_gabungan}", EXPORT_FORMATS[fmt_gabungan])
+                    with col_d_btn3:
+                            lazy_download(col_d_btn3, f"📦 Unduh Data{unit['label']} (Parquet)", f"data-parquet{suffix}", data_key,
+                                          lambda: to_parquet_bytes(df_merged_filtered),
+                                          f"{now_stamp}-{nama_file}.parquet", EXPORT_FORMATS["parquet"])
                 with col_d_btn2:
-                        col_d_btn2.download_button(
-                        label="📄 Unduh Ringkasan (HTML)",
-                        data=html_out,
-                        file_name=f"{now_stamp}-{filename} calibration_report.html",
-                        mime="text/html")
+                        report_key = (tuple(unit["merge_key"] for unit in mapped_units), str(start_datetime), str(end_datetime), filename)
+                        lazy_download(col_d_btn2, "📄 Unduh Ringkasan (HTML)", "laporan-html", report_key, build_report,
+                                      f"{now_stamp}-{filename} calibration_report.html", "text/html")
            
-        st.dataframe(lhks_df) 
+        for unit in mapped_units:
+            if len(mapped_units) > 1:
+                st.write(f"### {unit['name']}")
+            st.dataframe(unit["lhks_df"], column_config=float32_column_config(unit["lhks_df"])) 
         
         
 else:
-    st.info("📁 Silakan upload kedua file CSV terlebih dahulu.")
\ No newline at end of file
+    st.info("📁 Silakan upload kedua file CSV terlebih dahulu, atau pilih data dari arsip kampanye.")
+
+if profiler.records and PROFILE_LOG:
+    #Log JSON lines untuk pelacakan regresi selalu ditulis, panel hanya untuk tampilan
+    try:
+        profiler.write_jsonl(PROFILE_LOG)
+    except OSError as e:
+        st.sidebar.warning(f"⚠️ Log profiling tidak bisa ditulis ke {PROFILE_LOG}: {e}")
+if debug_panel and profiler.records:
+    with st.sidebar.expander("🐞 Profiling rerun ini", expanded=True):
+        profil_df = profiler.frame()
+        st.dataframe(profil_df, hide_index=True)
+        st.caption(f"Total tercatat: {profil_df['detik'].sum():.3f} detik (tahap bersarang/paralel ikut terhitung)")
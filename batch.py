@@ -0,0 +1,220 @@
+"""Jalankan komparasi kalibrasi tanpa UI Streamlit.
+
+Setiap subfolder di CAMPAIGN_DIR adalah satu lokasi/UUT berisi satu atau
+lebih CSV alat standar dan satu CSV UUT (nama file cocok dengan --uut-pattern).
+Mapping header dibaca dari --config, atau dari mapping.json di subfolder jika ada.
+
+Contoh config:
+    {
+        "id_std": "AWS-1",
+        "logger": "CS",
+        "ts_col_std": "Timestamp",
+        "ts_col_uut": "TIMESTAMP",
+        "mapping": {"Suhu": ["TA", "AirT"], "Tekanan": ["PP", "PA"]},
+        "unit_conversions": {"PA": ["InHg", "hPa"]},
+        "resample": "1min",
+        "resample_how": "mean",
+        "start": "2025-05-01 08:00",
+        "end": "2025-05-01 16:00"
+    }
+
+Pemakaian:
+    python batch.py CAMPAIGN_DIR --config mapping.json --out hasil/ --workers 8
+
+Dengan --streaming data dibaca per chunk sehingga memori tetap kecil untuk log
+berbulan-bulan; laporan hanya berisi tabel ringkasan (tanpa grafik dan data gabungan).
+Dengan --profile-log waktu, puncak memori dan jumlah baris tiap tahap per lokasi
+ditulis sebagai JSON lines untuk memantau regresi performa.
+Opsi "resample" (mis. "1s", "10s", "1min") hanya berlaku di mode biasa.
+"""
+import os
+import sys
+import json
+import fnmatch
+import argparse
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use("Agg")
+import pandas as pd
+
+from correction import CorrectionRegistry
+from ingestion import load_standard, load_uut
+from pipeline import (PARAMETER_CODES, convert_timestamps, apply_corrections, convert_uut_units,
+                      circular_columns, resample_frame, merge_data, filter_time_range, run_comparison)
+from report import to_excel_bytes, load_template, plot_series, report_plots, render_report
+from streaming import DEFAULT_CHUNKSIZE, stream_comparison
+from profiling import StageProfiler, stage
+
+def load_config(path):
+    with open(path) as f:
+        config = json.load(f)
+    for key in ("id_std", "logger", "mapping"):
+        if key not in config:
+            raise ValueError(f"{path}: kunci '{key}' wajib diisi")
+    unknown = [param for param in config["mapping"] if param not in PARAMETER_CODES]
+    if unknown:
+        raise ValueError(f"{path}: parameter tidak dikenal {unknown}, pilihan: {list(PARAMETER_CODES)}")
+    return config
+
+def find_sites(campaign_dir, uut_pattern):
+    sites = []
+    for name in sorted(os.listdir(campaign_dir)):
+        site_dir = os.path.join(campaign_dir, name)
+        if not os.path.isdir(site_dir):
+            continue
+        csv_files = sorted(f for f in os.listdir(site_dir) if f.lower().endswith(".csv"))
+        uut_files = [f for f in csv_files if fnmatch.fnmatch(f.lower(), uut_pattern.lower())]
+        standard_files = [os.path.join(site_dir, f) for f in csv_files if f not in uut_files]
+        if len(uut_files) != 1 or not standard_files:
+            print(f"[lewati] {name}: butuh tepat 1 file UUT dan minimal 1 file standar", file=sys.stderr)
+            continue
+        sites.append((name, standard_files, os.path.join(site_dir, uut_files[0])))
+    return sites
+
+def write_report(site_out, site, now_stamp, id_std, start_datetime, end_datetime, report_df, plots_base64, template_path):
+    html_out = render_report(
+        load_template(template_path),
+        subtitle = site,
+        info = f'Periode sampling: {start_datetime} sampai {end_datetime} | Alat Standar: {id_std}',
+        report_df = report_df,
+        plots_base64 = plots_base64
+    )
+    with open(os.path.join(site_out, f"{now_stamp}-{site} calibration_report.html"), "w") as f:
+        f.write(html_out)
+
+def site_settings(config):
+    ts_col_std = config.get("ts_col_std", "Timestamp")
+    ts_col_uut = config.get("ts_col_uut", "TIMESTAMP" if config["logger"] == "CS" else "Time")
+    params_mapping = {
+        param: [std_col, uut_col, PARAMETER_CODES[param]]
+        for param, (std_col, uut_col) in config["mapping"].items()
+    }
+    unit_conversions = {col: tuple(units) for col, units in config.get("unit_conversions", {}).items()}
+    return ts_col_std, ts_col_uut, params_mapping, unit_conversions
+
+def process_site_streaming(site, standard_files, uut_file, config, out_dir, registry, chunksize, template_path):
+    ts_col_std, ts_col_uut, params_mapping, unit_conversions = site_settings(config)
+    start_datetime = pd.Timestamp(config["start"]) if config.get("start") else None
+    end_datetime = pd.Timestamp(config["end"]) if config.get("end") else None
+    _, report_df, n_rows = stream_comparison(
+        standard_files, uut_file, config["logger"], params_mapping, config["id_std"], registry,
+        ts_col_std=ts_col_std, ts_col_uut=ts_col_uut, unit_conversions=unit_conversions,
+        start=start_datetime, end=end_datetime, chunksize=chunksize,
+    )
+    if n_rows == 0:
+        raise ValueError("tidak ada data standar dan UUT yang beririsan waktu")
+
+    site_out = os.path.join(out_dir, site)
+    os.makedirs(site_out, exist_ok=True)
+    now_stamp = datetime.now().strftime('%d%m%Y-%H%M%S')
+    with open(os.path.join(site_out, f"{now_stamp}-{site}-ringkasan.xlsx"), "wb") as f:
+        f.write(to_excel_bytes(report_df, 'Ringkasan').getvalue())
+    write_report(site_out, site, now_stamp, config["id_std"], start_datetime or "awal data", end_datetime or "akhir data",
+                 report_df, [], template_path)
+    return site, report_df
+
+def process_site(site, standard_files, uut_file, config, out_dir, correction_path="correction.json", template_path="report.html",
+                 streaming=False, chunksize=DEFAULT_CHUNKSIZE, profile_log=None):
+    registry = CorrectionRegistry(correction_path)
+    if streaming:
+        return process_site_streaming(site, standard_files, uut_file, config, out_dir, registry, chunksize, template_path)
+
+    profiler = StageProfiler(trace_memory=True, run_id=f"{datetime.now():%Y%m%d-%H%M%S}-{site}") if profile_log else None
+    result = process_site_in_memory(site, standard_files, uut_file, config, out_dir, registry, template_path, profiler)
+    if profiler is not None:
+        profiler.write_jsonl(profile_log)
+    return result
+
+def process_site_in_memory(site, standard_files, uut_file, config, out_dir, registry, template_path, profiler=None):
+
+    id_std = config["id_std"]
+    ts_col_std, ts_col_uut, params_mapping, unit_conversions = site_settings(config)
+    header_mapping = {std_col: uut_col for std_col, uut_col, _ in params_mapping.values()}
+
+    df_standard, _ = load_standard(standard_files, profiler=profiler)
+    df_uut = load_uut(uut_file, config["logger"], profiler=profiler)
+    with stage(profiler, "konversi timestamp"):
+        df_standard, df_uut = convert_timestamps(df_standard, df_uut, ts_col_std, ts_col_uut)
+
+    with stage(profiler, "koreksi standar", baris=len(df_standard)):
+        df_standard = apply_corrections(df_standard, params_mapping, id_std, registry)
+    df_uut = convert_uut_units(df_uut, unit_conversions)
+    circular_std, circular_uut = circular_columns(params_mapping)
+    resample_how = config.get("resample_how", "mean")
+    with stage(profiler, "resample") as rec:
+        df_standard = resample_frame(df_standard, ts_col_std, config.get("resample"), resample_how, circular_std)
+        df_uut = resample_frame(df_uut, ts_col_uut, config.get("resample"), resample_how, circular_uut)
+        rec["baris"] = len(df_standard)
+    with stage(profiler, "merge_asof") as rec:
+        df_merged = merge_data(df_standard, df_uut, ts_col_std, ts_col_uut, header_mapping)
+        rec["baris"] = len(df_merged)
+    if df_merged.empty:
+        raise ValueError("tidak ada data standar dan UUT yang beririsan waktu")
+
+    start_datetime = pd.Timestamp(config["start"]) if config.get("start") else df_merged[ts_col_std].min()
+    end_datetime = pd.Timestamp(config["end"]) if config.get("end") else df_merged[ts_col_std].max()
+    df_merged_filtered = filter_time_range(df_merged, ts_col_std, start_datetime, end_datetime)
+
+    with stage(profiler, "statistik per parameter", baris=len(df_merged_filtered)):
+        _, lhks_df, report_df = run_comparison(df_merged_filtered, params_mapping, ts_col_std)
+
+    site_out = os.path.join(out_dir, site)
+    os.makedirs(site_out, exist_ok=True)
+    now_stamp = datetime.now().strftime('%d%m%Y-%H%M%S')
+    with stage(profiler, "tulis Excel", baris=len(lhks_df)):
+        with open(os.path.join(site_out, f"{now_stamp}-{site}.xlsx"), "wb") as f:
+            f.write(to_excel_bytes(lhks_df, 'Data Gabungan').getvalue())
+
+    with stage(profiler, "grafik laporan"):
+        plots_base64 = report_plots(plot_series(df_merged_filtered, ts_col_std, params_mapping), params_mapping)
+    with stage(profiler, "render HTML"):
+        write_report(site_out, site, now_stamp, id_std, start_datetime, end_datetime, report_df, plots_base64, template_path)
+    return site, report_df
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Komparasi kalibrasi AWOS secara batch (tanpa UI)")
+    parser.add_argument("campaign_dir", help="folder berisi subfolder per lokasi/UUT")
+    parser.add_argument("--config", help="config mapping default (JSON)")
+    parser.add_argument("--out", default="hasil", help="folder keluaran laporan")
+    parser.add_argument("--uut-pattern", default="*uut*.csv", help="pola nama file UUT di tiap subfolder")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="jumlah proses paralel")
+    parser.add_argument("--correction", default="correction.json", help="file tabel koreksi alat standar")
+    parser.add_argument("--template", default="report.html", help="template laporan HTML")
+    parser.add_argument("--streaming", action="store_true", help="proses per chunk dengan memori terbatas (hanya ringkasan)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="jumlah baris per chunk pada mode streaming")
+    parser.add_argument("--profile-log", help="tulis waktu/memori/jumlah baris per tahap ke file JSON lines")
+    args = parser.parse_args(argv)
+
+    default_config = load_config(args.config) if args.config else None
+    jobs = []
+    for site, standard_files, uut_file in find_sites(args.campaign_dir, args.uut_pattern):
+        site_config_path = os.path.join(args.campaign_dir, site, "mapping.json")
+        config = load_config(site_config_path) if os.path.exists(site_config_path) else default_config
+        if config is None:
+            print(f"[lewati] {site}: tidak ada mapping.json dan --config tidak diberikan", file=sys.stderr)
+            continue
+        jobs.append((site, standard_files, uut_file, config))
+
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(process_site, site, standard_files, uut_file, config, args.out, args.correction, args.template,
+                            args.streaming, args.chunksize, args.profile_log): site
+            for site, standard_files, uut_file, config in jobs
+        }
+        for future in as_completed(futures):
+            site = futures[future]
+            try:
+                _, report_df = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[gagal] {site}: {e}", file=sys.stderr)
+                continue
+            print(f"[selesai] {site}")
+            print(report_df.to_string(index=False))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""Benchmark pipeline kalibrasi dengan data logger sintetis (bisa jalan offline).
+
+Generator membuat CSV alat standar (Timestamp + kolom Stat_ dengan INVALID
+sesekali, desimal koma, pemisah titik koma) serta CSV UUT format CS (TOA5) dan
+Vaisala/AWI berisi data 1 Hz selama 1 hari / 1 minggu / 1 bulan. File disimpan
+di --data-dir dan dipakai ulang pada run berikutnya.
+
+Setiap tahap diukur beberapa kali (gaya pytest-benchmark: min/rerata/stdev) dan
+hasilnya dicetak serta ditambahkan ke --out sebagai JSON lines, lengkap dengan
+commit git, agar setiap perubahan performa bisa dibandingkan dengan kode lama.
+
+Pemakaian:
+    python benchmark.py --sizes 1d 1w --repeat 3 --logger CS
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pandas as pd
+
+from correction import CorrectionRegistry
+from ingestion import read_standard_csv, clean_std_df, load_standard, load_uut
+from pipeline import convert_timestamps, apply_corrections, convert_uut_units, merge_data, run_comparison
+from window_stats import WindowStats
+from report import clear_image_cache, export_bytes, load_template, plot_series, report_plots, render_report
+
+SIZES = {"1d": 86400, "1w": 7 * 86400, "1m": 30 * 86400}
+START = pd.Timestamp("2025-05-01 00:00:00")
+DATA_DIR = os.environ.get("KALIBRASI_BENCH_DIR", ".bench")
+
+#Sensor standar: (kolom standar, kolom UUT, parameter, kode)
+SENSORS = [
+    ("TA", "AirT", "Suhu", "TT"),
+    ("RH", "RHu", "Kelembapan", "RH"),
+    ("PP", "PA", "Tekanan", "PP"),
+    ("WS", "WSu", "Kecepatan Angin", "WS"),
+    ("WD", "WDu", "Arah Angin", "WD"),
+    ("SR", "SRu", "Radiasi Matahari", "SR"),
+]
+UNITS = {"TA": "degC", "RH": "%", "PP": "hPa", "WS": "m/s", "WD": "deg", "SR": "W/m2"}
+
+def synthetic_weather(n_seconds, seed=0):
+    #Siklus harian suhu/kelembapan/radiasi, tekanan semi-diurnal, angin berembus dan
+    #arah angin yang melintasi utara (0/360) agar kasus sirkular ikut teruji
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_seconds)
+    day = 2 * np.pi * ((t / 86400.0) - 0.25)
+    ta = 27 + 4 * np.sin(day) + np.cumsum(rng.normal(0, 0.002, n_seconds)) + rng.normal(0, 0.05, n_seconds)
+    rh = np.clip(75 - 15 * np.sin(day) + rng.normal(0, 0.5, n_seconds), 5, 100)
+    pp = 1008 + 1.5 * np.sin(2 * day) + rng.normal(0, 0.05, n_seconds)
+    ws = np.abs(3 + 1.5 * np.sin(day) + rng.gamma(2.0, 0.3, n_seconds) - 0.6)
+    wd = (355 + 40 * np.sin(t / 5400.0) + rng.normal(0, 8, n_seconds)) % 360
+    sr = np.clip(1000 * np.sin(day), 0, None) + np.abs(rng.normal(0, 5, n_seconds))
+    return pd.DataFrame({"TA": ta, "RH": rh, "PP": pp, "WS": ws, "WD": wd, "SR": sr})
+
+def generate_standard_csv(path, n_seconds, seed=0, invalid_rate=0.002):
+    weather = synthetic_weather(n_seconds, seed)
+    rng = np.random.default_rng(seed + 1)
+    df = pd.DataFrame({"Date Time": pd.date_range(START, periods=n_seconds, freq="s").strftime("%m/%d/%y %I:%M:%S %p")})
+    names, units = ["Date Time"], [""]
+    for col in weather.columns:
+        #INVALID muncul berkelompok singkat seperti sensor yang sedang bermasalah
+        burst = rng.random(n_seconds) < invalid_rate / 10
+        invalid = np.convolve(burst, np.ones(10, dtype=bool), mode="same") > 0
+        df[f"stat {col}"] = np.where(invalid, "INVALID", "OK")
+        df[col] = weather[col].round(3)
+        names += ["", col]
+        units += ["", UNITS[col]]
+    #sensor tidak terpasang: seluruh status INVALID, kolomnya dibuang saat cleaning
+    df["stat XX"] = "INVALID"
+    df["XX"] = 0
+    names += ["", "XX"]
+    units += ["", "-"]
+    with open(path, "w", newline="") as f:
+        f.write(";".join(names) + "\n" + ";".join(units) + "\n")
+        df.to_csv(f, sep=";", decimal=",", header=False, index=False, float_format="%.3f")
+
+def generate_uut_csv(path, logger, n_seconds, seed=0):
+    #UUT membaca cuaca yang sama dengan bias + derau sendiri
+    weather = synthetic_weather(n_seconds, seed)
+    rng = np.random.default_rng(seed + 2)
+    df = pd.DataFrame({
+        "AirT": (weather["TA"] + 0.1 + rng.normal(0, 0.05, n_seconds)).round(3),
+        "RHu": (weather["RH"] - 1.5 + rng.normal(0, 0.5, n_seconds)).round(2),
+        "PA": (weather["PP"] + 0.2 + rng.normal(0, 0.05, n_seconds)).round(2),
+        "WSu": (weather["WS"] * 0.97 + rng.normal(0, 0.1, n_seconds)).clip(0).round(2),
+        "WDu": ((weather["WD"] + 5 + rng.normal(0, 3, n_seconds)) % 360).round(1),
+        "SRu": (weather["SR"] * 0.98 + rng.normal(0, 3, n_seconds)).clip(0).round(1),
+    })
+    times = pd.date_range(START, periods=n_seconds, freq="s")
+    with open(path, "w", newline="") as f:
+        if logger == "CS":
+            #format TOA5, tekanan dalam InHg seperti logger lapangan
+            df["PA"] = (df["PA"] / 33.86388).round(4)
+            df.insert(0, "RECORD", np.arange(n_seconds))
+            df.insert(0, "TIMESTAMP", times.strftime("%Y-%m-%d %H:%M:%S"))
+            f.write('"TOA5","CR1000X","CR1000X","1","CR1000X.Std","CPU:bench.CR1X","1","Table1"\n')
+            f.write(",".join(f'"{col}"' for col in df.columns) + "\n")
+            f.write('"TS","RN","degC","%","InHg","m/s","deg","W/m2"\n')
+            f.write('"","","Smp","Smp","Smp","Smp","Smp","Smp"\n')
+        else:
+            df.insert(0, "Time", times.strftime("%Y-%m-%d %H:%M:%S"))
+            df.insert(0, "Date", times.strftime("%Y-%m-%d"))
+            f.write(",".join(df.columns) + "\n")
+        df.to_csv(f, header=False, index=False)
+
+def dataset(size, logger, data_dir=DATA_DIR):
+    os.makedirs(data_dir, exist_ok=True)
+    n_seconds = SIZES[size]
+    std_path = os.path.join(data_dir, f"standar-{size}.csv")
+    uut_path = os.path.join(data_dir, f"uut-{logger.split('/')[0].lower()}-{size}.csv")
+    if not os.path.exists(std_path):
+        generate_standard_csv(std_path, n_seconds)
+    if not os.path.exists(uut_path):
+        generate_uut_csv(uut_path, logger, n_seconds)
+    return std_path, uut_path
+
+def bench(name, func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, {
+        "tahap": name,
+        "min": min(timings),
+        "rerata": statistics.fmean(timings),
+        "stdev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "repeat": repeat,
+    }
+
+def run_size(size, logger, repeat, registry, id_std, data_dir=DATA_DIR):
+    std_path, uut_path = dataset(size, logger, data_dir)
+    ts_col_uut = "TIMESTAMP" if logger == "CS" else "Time"
+    params_mapping = {param: [std_col, uut_col, code] for std_col, uut_col, param, code in SENSORS}
+    header_mapping = {std_col: uut_col for std_col, uut_col, _ in params_mapping.values()}
+    unit_conversions = {"PA": ("InHg", "hPa")} if logger == "CS" else {}
+
+    results = []
+    raw, r = bench("read_standard_csv", lambda: read_standard_csv(std_path), repeat); results.append(r)
+    _, r = bench("clean_std_df", lambda: clean_std_df(raw), repeat); results.append(r)
+    (df_standard, _), r = bench("load_standard", lambda: load_standard([std_path]), repeat); results.append(r)
+    df_uut, r = bench("load_uut", lambda: load_uut(uut_path, logger), repeat); results.append(r)
+    (df_standard, df_uut), r = bench("convert_timestamps",
+                                     lambda: convert_timestamps(df_standard.copy(), df_uut.copy(), "Timestamp", ts_col_uut), repeat)
+    results.append(r)
+    df_standard, r = bench("apply_corrections",
+                           lambda: apply_corrections(df_standard.copy(), params_mapping, id_std, registry), repeat)
+    results.append(r)
+    df_uut = convert_uut_units(df_uut, unit_conversions)
+    df_merged, r = bench("merge_data", lambda: merge_data(df_standard, df_uut, "Timestamp", ts_col_uut, header_mapping), repeat)
+    results.append(r)
+    engine, r = bench("WindowStats", lambda: WindowStats(df_merged, params_mapping, "Timestamp"), repeat); results.append(r)
+    start, end = df_merged["Timestamp"].iloc[0], df_merged["Timestamp"].iloc[-1]
+    window_stats, r = bench("parameter_stats", lambda: engine.parameter_stats(start, end), repeat); results.append(r)
+    (_, lhks_df, report_df), r = bench("run_comparison",
+                                       lambda: run_comparison(df_merged.copy(), params_mapping, "Timestamp", window_stats), repeat)
+    results.append(r)
+    series, r = bench("plot_series", lambda: plot_series(df_merged, "Timestamp", params_mapping), repeat); results.append(r)
+    def report_plots_cold():
+        clear_image_cache()
+        return report_plots(series, params_mapping)
+    plots, r = bench("report_plots", report_plots_cold, repeat); results.append(r)
+    _, r = bench("report_plots (memo)", lambda: report_plots(series, params_mapping), repeat); results.append(r)
+    template = load_template("report.html")
+    _, r = bench("render_report", lambda: render_report(template, size, "benchmark", report_df, plots), repeat); results.append(r)
+    for fmt in ("csv", "parquet", "xlsx"):
+        if fmt == "xlsx" and size != "1d":
+            continue #xlsx data 1 Hz berminggu-minggu terlalu lama untuk diulang
+        _, r = bench(f"export {fmt}", lambda: export_bytes(lhks_df, fmt, "Data"), repeat); results.append(r)
+
+    for r in results:
+        r.update({"ukuran": size, "logger": logger, "baris_standar": len(df_standard), "baris_gabung": len(df_merged)})
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline kalibrasi dengan data sintetis")
+    parser.add_argument("--sizes", nargs="+", default=["1d"], choices=list(SIZES), help="durasi data 1 Hz")
+    parser.add_argument("--logger", default="CS", choices=["CS", "Vaisala/AWI"], help="format CSV UUT")
+    parser.add_argument("--repeat", type=int, default=3, help="jumlah pengulangan tiap tahap")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="folder data sintetis")
+    parser.add_argument("--correction", default="correction.json", help="file tabel koreksi alat standar")
+    parser.add_argument("--out", default="benchmark.jsonl", help="file JSON lines hasil benchmark")
+    args = parser.parse_args(argv)
+
+    registry = CorrectionRegistry(args.correction)
+    commit, waktu = git_commit(), datetime.now().isoformat(timespec="seconds")
+    all_results = []
+    for size in args.sizes:
+        results = run_size(size, args.logger, args.repeat, registry, registry.ids()[0], args.data_dir)
+        all_results += results
+        print(f"== {size} ({results[0]['baris_standar']} baris standar, {results[0]['baris_gabung']} baris gabung)")
+        print(pd.DataFrame(results)[["tahap", "min", "rerata", "stdev"]].to_string(index=False, float_format="%.4f"))
+
+    with open(args.out, "a", encoding="utf-8") as f:
+        for r in all_results:
+            f.write(json.dumps({"commit": commit, "waktu": waktu, **r}) + "\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
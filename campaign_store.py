@@ -0,0 +1,171 @@
+"""Arsip kampanye lokal: data standar/UUT yang sudah dibersihkan disimpan sekali.
+
+Struktur di STORE_DIR (dataset Parquet terpartisi per unit dan per hari):
+    standar/aws_id=<id>/tanggal=YYYY-MM-DD/data.parquet
+    uut/uut_id=<id>/tanggal=YYYY-MM-DD/data.parquet
+    <jenis>/<kunci>=<id>/meta.json       kolom waktu, logger
+    koreksi/<sha256>.json + riwayat.jsonl  salinan correction.json per versi
+
+Setiap file harian terurut waktu dan bebas timestamp ganda, jadi query rentang
+waktu cukup membaca partisi hari yang beririsan lalu memotong dengan filter
+pushdown Parquet, tanpa parsing CSV ulang.
+"""
+import os
+import json
+import hashlib
+import tempfile
+from datetime import datetime
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+STORE_DIR = os.environ.get("KALIBRASI_STORE_DIR", "arsip")
+KINDS = {"standar": "aws_id", "uut": "uut_id"}
+
+class CampaignStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+
+    def _unit_dir(self, kind, unit_id):
+        return os.path.join(self.root, kind, f"{KINDS[kind]}={quote(str(unit_id), safe='')}")
+
+    def _day_path(self, kind, unit_id, day):
+        return os.path.join(self._unit_dir(kind, unit_id), f"tanggal={day}", "data.parquet")
+
+    def units(self, kind):
+        base = os.path.join(self.root, kind)
+        if not os.path.isdir(base):
+            return []
+        prefix = f"{KINDS[kind]}="
+        return sorted(unquote(name[len(prefix):]) for name in os.listdir(base) if name.startswith(prefix))
+
+    def meta(self, kind, unit_id):
+        path = os.path.join(self._unit_dir(kind, unit_id), "meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def days(self, kind, unit_id):
+        unit_dir = self._unit_dir(kind, unit_id)
+        if not os.path.isdir(unit_dir):
+            return []
+        return sorted(name.split("=", 1)[1] for name in os.listdir(unit_dir)
+                      if name.startswith("tanggal=") and os.path.exists(os.path.join(unit_dir, name, "data.parquet")))
+
+    def time_bounds(self, kind, unit_id):
+        days = self.days(kind, unit_id)
+        if not days:
+            return None
+        ts_col = self.meta(kind, unit_id)["ts_col"]
+        first = _read_day(self._day_path(kind, unit_id, days[0]), columns=[ts_col]).column(0)
+        last = _read_day(self._day_path(kind, unit_id, days[-1]), columns=[ts_col]).column(0)
+        return pd.Timestamp(first[0].as_py()), pd.Timestamp(last[-1].as_py())
+
+    def ingest(self, kind, unit_id, df, ts_col, **meta):
+        #Data dipecah per hari lalu digabung dengan isi partisi yang sudah ada;
+        #timestamp yang sama ditimpa data terbaru sehingga ingest ulang aman
+        df = df.dropna(subset=[ts_col])
+        df = df[[ts_col] + [col for col in df.columns if col != ts_col]]
+        days = df[ts_col].dt.strftime("%Y-%m-%d")
+        n_rows = 0 #baris baru atau yang menimpa timestamp lama, bukan isi partisi seluruhnya
+        for day, part in df.groupby(days.to_numpy(), sort=True):
+            path = self._day_path(kind, unit_id, day)
+            part = part.drop_duplicates(subset=ts_col, keep="last")
+            n_rows += len(part)
+            if os.path.exists(path):
+                existing = _read_day(path).to_pandas()
+                part = _restore_categories(pd.concat([existing, part], ignore_index=True), part)
+                part = part.drop_duplicates(subset=ts_col, keep="last")
+            _write_atomic(path, part.sort_values(ts_col))
+        meta = {**(self.meta(kind, unit_id) or {}), **meta, "ts_col": ts_col}
+        meta_path = os.path.join(self._unit_dir(kind, unit_id), "meta.json")
+        os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+        with open(meta_path, "w") as f:
+            json.dump(meta, f)
+        return n_rows
+
+    def load_range(self, kind, unit_id, start=None, end=None):
+        #Hanya partisi hari yang beririsan dengan [start, end] yang dibaca
+        meta = self.meta(kind, unit_id)
+        if meta is None:
+            return pd.DataFrame()
+        ts_col = meta["ts_col"]
+        start, end = _as_timestamp(start), _as_timestamp(end)
+        filters = []
+        if start is not None:
+            filters.append((ts_col, ">=", start.to_pydatetime()))
+        if end is not None:
+            filters.append((ts_col, "<=", end.to_pydatetime()))
+        tables = [_read_day(self._day_path(kind, unit_id, day), filters=filters or None)
+                  for day in self._days_in_range(kind, unit_id, start, end)]
+        if not tables:
+            return pd.DataFrame()
+        df = pa.concat_tables(tables, promote_options="default").to_pandas()
+        df[ts_col] = df[ts_col].astype("datetime64[ns]")
+        return df.reset_index(drop=True)
+
+    def _days_in_range(self, kind, unit_id, start, end):
+        return [day for day in self.days(kind, unit_id)
+                if (start is None or day >= f"{start:%Y-%m-%d}") and (end is None or day <= f"{end:%Y-%m-%d}")]
+
+    def version(self, kind, unit_id, start=None, end=None):
+        #Kunci cache: berubah bila ada partisi di rentang itu yang ditulis ulang
+        start, end = _as_timestamp(start), _as_timestamp(end)
+        parts = [(day, os.stat(self._day_path(kind, unit_id, day)).st_mtime_ns) for day in self._days_in_range(kind, unit_id, start, end)]
+        return hashlib.sha256(repr((kind, unit_id, str(start), str(end), parts)).encode()).hexdigest()
+
+    def save_corrections(self, registry):
+        #Simpan salinan tabel koreksi per versi (sha256) dan catat kapan versi itu mulai dipakai
+        history_dir = os.path.join(self.root, "koreksi")
+        os.makedirs(history_dir, exist_ok=True)
+        path = os.path.join(history_dir, f"{registry.digest}.json")
+        if not os.path.exists(path):
+            with open(path, "w") as f:
+                json.dump(registry.data, f, indent=1)
+        history = self.correction_history()
+        if history.empty or history["digest"].iloc[-1] != registry.digest:
+            with open(os.path.join(history_dir, "riwayat.jsonl"), "a") as f:
+                f.write(json.dumps({"waktu": datetime.now().isoformat(timespec="seconds"), "digest": registry.digest}) + "\n")
+
+    def correction_history(self):
+        path = os.path.join(self.root, "koreksi", "riwayat.jsonl")
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=["waktu", "digest"])
+        return pd.read_json(path, lines=True, dtype={"digest": str})
+
+    def load_corrections(self, digest):
+        with open(os.path.join(self.root, "koreksi", f"{digest}.json")) as f:
+            return json.load(f)
+
+def _as_timestamp(value):
+    return pd.Timestamp(value) if value is not None else None
+
+def _read_day(path, **kwargs):
+    #partitioning=None: nama folder aws_id=/tanggal= jangan ikut jadi kolom
+    return pq.read_table(path, partitioning=None, **kwargs)
+
+def _restore_categories(df, like):
+    #concat kategori dengan kategori berbeda jatuh ke object, kembalikan ke category
+    for col in like.columns:
+        if isinstance(like[col].dtype, pd.CategoricalDtype) and col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+def _write_atomic(path, df):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    #nama sementara unik per panggilan: sesi Streamlit lain (thread di proses yang sama)
+    #bisa menulis partisi hari yang sama
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,92 @@
+import os
+import io
+import json
+import hashlib
+import tempfile
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+CACHE_DIR = os.environ.get("KALIBRASI_CACHE_DIR", ".cache")
+#Batas ukuran folder cache; file yang paling lama tidak dipakai dihapus lebih dulu
+CACHE_MAX_BYTES = int(float(os.environ.get("KALIBRASI_CACHE_MAX_MB", "2048")) * 2**20)
+#Naikkan setiap kali isi frame yang di-cache berubah (dtype, pembersihan, kolom hasil merge)
+#agar file lama tidak dipakai lagi; file lama akhirnya terhapus oleh pemangkasan LRU
+CACHE_VERSION = 2
+_META_KEY = b"kalibrasi"
+
+def cache_key(stage, *parts):
+    digest = hashlib.sha256(repr((CACHE_VERSION, parts)).encode()).hexdigest()[:32]
+    return f"{stage}-{digest}"
+
+def _path(key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, f"{key}.feather")
+
+def load_frame(key, cache_dir=None):
+    #Baca Feather dengan memory map, hasilnya (df, meta) atau None jika belum ada
+    path = _path(key, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = feather.read_table(path, memory_map=True)
+        os.utime(path) #mtime dipakai sebagai waktu terakhir dipakai untuk pemangkasan LRU
+    except (pa.ArrowException, OSError):
+        return None
+    metadata = table.schema.metadata or {}
+    meta = json.loads(metadata[_META_KEY]) if _META_KEY in metadata else None
+    return table.to_pandas(), meta
+
+def save_frame(key, df, meta=None, cache_dir=None):
+    path = _path(key, cache_dir)
+    try:
+        table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+        if meta is not None:
+            table = table.replace_schema_metadata({**(table.schema.metadata or {}), _META_KEY: json.dumps(meta).encode()})
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        #nama sementara unik per panggilan, bukan per PID: thread sesi lain di proses yang sama
+        #bisa menulis kunci yang sama pada saat bersamaan
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            #tanpa kompresi agar memory_map benar-benar zero-copy (lz4 harus didekompresi ke RAM)
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, path) #tulis atomik agar sesi lain tidak membaca file setengah jadi
+        except BaseException:
+            _remove_quietly(tmp_path)
+            raise
+    except (pa.ArrowException, OSError, TypeError, ValueError):
+        return False
+    prune_cache(cache_dir, keep=path)
+    return True
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def prune_cache(cache_dir=None, max_bytes=CACHE_MAX_BYTES, keep=None):
+    #Hapus file Feather yang paling lama tidak dipakai sampai total ukuran <= max_bytes
+    cache_dir = cache_dir or CACHE_DIR
+    try:
+        entries = [(entry.stat().st_mtime, entry.stat().st_size, entry.path)
+                   for entry in os.scandir(cache_dir) if entry.name.endswith(".feather")]
+    except OSError:
+        return
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep is not None and os.path.abspath(path) == os.path.abspath(keep):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue #mungkin sudah dihapus sesi lain
+        total -= size
+
+def to_parquet_bytes(df):
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,82 @@
+import os
+import json
+import hashlib
+import threading
+
+import numpy as np
+
+
+class CorrectionRegistry:
+    """Tabel koreksi alat standar dari correction.json.
+
+    File divalidasi sekali lalu disimpan sebagai array NumPy terurut per
+    ID AWS dan parameter. File hanya dibaca ulang jika mtime/isinya berubah.
+    """
+
+    def __init__(self, path='correction.json'):
+        self.path = path
+        self.data = {}
+        self._tabel = {}
+        self._mtime = None
+        self.digest = None
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        # Cek mtime dulu (murah), hash isi file hanya jika mtime berubah
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime == self._mtime:
+            return False
+        with self._lock:
+            if mtime == self._mtime:
+                return False
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+            digest = hashlib.sha256(raw).hexdigest()
+            changed = digest != self.digest
+            if changed:
+                data = json.loads(raw)
+                tabel = self._compile(data)
+                self.data = data
+                self._tabel = tabel
+                self.digest = digest
+            self._mtime = mtime
+            return changed
+
+    @staticmethod
+    def _compile(data):
+        tabel = {}
+        for id_aws, params in data.items():
+            if not isinstance(params, dict):
+                raise ValueError(f"Format koreksi {id_aws} tidak valid")
+            for parameter, daftar_koreksi in params.items():
+                try:
+                    daftar_koreksi = sorted(daftar_koreksi, key=lambda x: float(x['setpoin']))
+                    setpoints = np.array([item['setpoin'] for item in daftar_koreksi], dtype=float)
+                    koreksis = np.array([item['koreksi'] for item in daftar_koreksi], dtype=float)
+                except (KeyError, TypeError, ValueError) as e:
+                    raise ValueError(f"Tabel koreksi {id_aws}/{parameter} tidak valid: {e}") from e
+                if len(setpoints) == 0:
+                    raise ValueError(f"Tabel koreksi {id_aws}/{parameter} kosong")
+                tabel[(id_aws, parameter)] = (setpoints, koreksis)
+        return tabel
+
+    def ids(self):
+        return list(self.data.keys())
+
+    def tabel(self, id_aws, parameter):
+        return self._tabel[(id_aws, parameter)]
+
+    def interpolator(self, id_aws, parameter):
+        # Tanpa memo: np.interp di atas array tersimpan tidak butuh persiapan, dan closure
+        # selalu memegang tabel yang dibaca sekali di sini walau refresh() menukar tabel
+        setpoints, koreksis = self._tabel[(id_aws, parameter)]
+
+        # np.interp menahan nilai di ujung tabel, sama dengan fill_value=(koreksis[0], koreksis[-1])
+        def interpolator(nilai_baca):
+            return np.interp(np.asarray(nilai_baca, dtype=float), setpoints, koreksis)
+
+        return interpolator
+
+    def terapkan(self, id_aws, parameter, nilai_baca):
+        return self.interpolator(id_aws, parameter)(nilai_baca)
@@ -0,0 +1,44 @@
+import numpy as np
+
+DEFAULT_POINTS = 2000
+
+def _first_per_bucket(idx, bucket):
+    if len(idx) == 0:
+        return idx
+    b = bucket[idx]
+    return idx[np.r_[True, b[1:] != b[:-1]]]
+
+def minmax_downsample(df, x_col, y_cols, n_points=DEFAULT_POINTS):
+    #Bagi data jadi beberapa bucket berurutan, simpan titik awal/akhir serta min/max
+    #tiap kolom y per bucket agar puncak dan lembah tetap terlihat di grafik
+    n = len(df)
+    if n <= n_points:
+        return df
+    n_buckets = max(n_points // (2 + 2 * len(y_cols)), 1)
+    bucket = (np.arange(n) * n_buckets) // n
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+
+    keep = np.zeros(n, dtype=bool)
+    keep[starts] = True
+    keep[np.r_[starts[1:] - 1, n - 1]] = True
+    for col in y_cols:
+        values = df[col].to_numpy(dtype=float)
+        nan = np.isnan(values)
+        for reduce, fill in ((np.minimum, np.inf), (np.maximum, -np.inf)):
+            filled = np.where(nan, fill, values)
+            extreme = reduce.reduceat(filled, starts)
+            idx = np.flatnonzero((filled == extreme[bucket]) & ~nan)
+            keep[_first_per_bucket(idx, bucket)] = True
+    return df.iloc[np.flatnonzero(keep)]
+
+def level_of_detail(df, x_col, y_cols, start=None, end=None, n_points=DEFAULT_POINTS):
+    #Semakin sempit rentang yang dilihat (zoom), semakin rapat titik yang ditampilkan
+    if start is not None or end is not None:
+        x = df[x_col]
+        mask = np.ones(len(df), dtype=bool)
+        if start is not None:
+            mask &= (x >= start).to_numpy()
+        if end is not None:
+            mask &= (x <= end).to_numpy()
+        df = df[mask]
+    return minmax_downsample(df, x_col, y_cols, n_points)
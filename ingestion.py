@@ -0,0 +1,195 @@
+import os
+import csv
+import re
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from profiling import stage
+
+UUT_LOGGER = ["CS","Vaisala/AWI"]
+
+#Resolusi sensor (3-4 digit signifikan) cukup ditampung float32, separuh memori float64
+FLOAT_DTYPE = "float32"
+
+DELIMITERS = ",;\t|"
+SAMPLE_BYTES = 64 * 1024
+_COMMA_DECIMAL = re.compile(r'(?:^|[^\d,.])-?\d+,\d+(?:[^\d,.]|$)')
+
+def _rewind(source):
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+def read_head(source, size=SAMPLE_BYTES):
+    # Ambil beberapa baris awal saja untuk deteksi format
+    if hasattr(source, 'read'):
+        _rewind(source)
+        raw = source.read(size)
+        _rewind(source)
+    else:
+        with open(source, 'rb') as f:
+            raw = f.read(size)
+    text = raw if isinstance(raw, str) else raw.decode('utf-8-sig', errors='replace')
+    lines = text.splitlines()
+    if len(raw) == size:
+        lines = lines[:-1] #baris terakhir bisa terpotong
+    return lines
+
+def sniff_format(lines, header_row=0, data_row=1):
+    # Delimiter dari baris header (seperti sep=None), desimal dari sampel baris data
+    header_line = lines[header_row] if len(lines) > header_row else ''
+    try:
+        sep = csv.Sniffer().sniff(header_line, delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        sep = max(DELIMITERS, key=header_line.count)
+
+    decimal = '.'
+    if sep != ',':
+        for line in lines[data_row:data_row + 50]:
+            if any(_COMMA_DECIMAL.search(field) for field in line.split(sep)):
+                decimal = ','
+                break
+    return sep, decimal
+
+def _read_columns(source, sep, skiprows=None):
+    return pd.read_csv(_rewind(source), sep=sep, skiprows=skiprows, nrows=0).columns
+
+def read_standard_csv(source, chunksize=None, usecols=None):
+    lines = read_head(source)
+    sep, decimal = sniff_format(lines, header_row=0, data_row=2)
+    columns = _read_columns(source, sep)
+
+    #kolom waktu dibaca sebagai teks, status (OK/INVALID) sebagai kategori, sisanya langsung numerik
+    text_cols = {col: (str if i == 0 else "category") for i, col in enumerate(columns) if i == 0 or 'Unnamed' in col}
+    return pd.read_csv(_rewind(source), sep=sep, decimal=decimal, skiprows=[1], dtype=text_cols, engine='c',
+                       chunksize=chunksize, usecols=usecols)
+
+def read_uut_csv(source, logger, chunksize=None):
+    lines = read_head(source)
+    if logger == "CS":
+        #format TOA5: 1 baris info logger, header, 2 baris satuan/jenis data
+        sep, decimal = sniff_format(lines, header_row=1, data_row=4)
+        columns = _read_columns(source, sep, skiprows=[0])
+        skiprows = [0, 2, 3]
+        text_cols = {columns[0]: str}
+    else:
+        sep, decimal = sniff_format(lines, header_row=0, data_row=1)
+        columns = _read_columns(source, sep)
+        skiprows = None
+        text_cols = {col: str for col in columns[:2]}
+    return pd.read_csv(_rewind(source), sep=sep, decimal=decimal, skiprows=skiprows, dtype=text_cols, engine='c', chunksize=chunksize)
+
+def convert_columns_to_float(df, exclude_cols):
+    for col in df.columns:
+        if col not in exclude_cols:
+            try:
+                df[col] = df[col].str.replace(',', '.').astype(FLOAT_DTYPE) #konversi desimal yang pakai koma
+            except (ValueError, AttributeError):
+                df[col] = pd.to_numeric(df[col], errors='coerce').astype(FLOAT_DTYPE) #konversi desimal yang pakai titik
+    return df
+
+def invalid_status_mask(status):
+    # Cukup cek nilai unik status (OK/INVALID/...), lalu petakan balik ke tiap baris
+    codes, uniques = pd.factorize(status)
+    flags = np.array(["INVALID" in str(value).upper() for value in uniques] + [False])
+    return flags[codes] #kode -1 (NaN) jatuh ke False
+
+def std_header(columns):
+    columns = [col.strip() for col in columns]
+    new_header = []
+    for i, col in enumerate(columns):
+        if 'Unnamed' in col and i > 0:
+            next_col = columns[i+1] if i+1 < len(columns) else ''
+            new_header.append(f'Stat_{next_col}')
+        elif i == 0:
+            new_header.append('Timestamp')
+        else:
+            new_header.append(col)
+    return new_header
+
+def clean_std_df(input_df):
+    #Header diganti tanpa menyalin data, kolom dan baris yang dibuang disaring sekali di akhir
+    std_df = input_df.set_axis(std_header(input_df.columns), axis=1, copy=False) #ubah format header standar
+    empty_cols = [col for col in std_df.columns if std_df[col].isna().all()] #hapus kolom lebih
+    std_df = std_df.drop(columns=empty_cols) if empty_cols else std_df #baris satuan sudah dilewati saat read_standard_csv
+
+    std_df_cols = std_df.columns
+    status_std_cols = [col for col in std_df_cols if col.lower().startswith("stat")]
+
+    #Hapus kolom dari sensor yang tidak terpakai (kolom invalid)
+    invalid_stat_columns = [col for col in status_std_cols if (std_df[col] == "INVALID").all()]
+
+    sensor_columns_to_drop = [
+        col.replace('Stat_', '') for col in invalid_stat_columns
+        if col.replace('Stat_', '') in std_df_cols
+    ]
+
+    drop_cols = invalid_stat_columns + sensor_columns_to_drop
+    keep_cols = [col for col in std_df_cols if col not in drop_cols]
+
+    #Hapus baris data yang invalid, dicek per kolom status
+    status_std_cols = [col for col in status_std_cols if col not in invalid_stat_columns]
+    invalid_counts = {}
+    invalid_mask = np.zeros(len(std_df), dtype=bool)
+    for col in status_std_cols:
+        col_mask = invalid_status_mask(std_df[col])
+        invalid_counts[col.replace('Stat_', '')] = int(col_mask.sum())
+        invalid_mask |= col_mask
+    std_df = std_df.loc[~invalid_mask, keep_cols]
+
+    #Konversi data numerik ke float
+    exclude_cols_std = [std_df.columns[0]] + status_std_cols
+    std_df = convert_columns_to_float(std_df, exclude_cols_std)
+
+    return std_df, invalid_counts
+
+def _load_standard_file(source, profiler=None):
+    name = getattr(source, "name", source)
+    with stage(profiler, "parse standar", file=name) as rec:
+        raw_df = read_standard_csv(source)
+        rec["baris"] = len(raw_df)
+    with stage(profiler, "clean_std_df", file=name) as rec:
+        std_df, invalid_counts = clean_std_df(raw_df)
+        rec["baris"] = len(std_df)
+    return std_df, invalid_counts
+
+def load_standard(sources, max_workers=None, profiler=None):
+    #Parsing + cleaning tiap file berjalan paralel (parser C pandas melepas GIL)
+    sources = list(sources)
+    max_workers = max_workers or min(len(sources), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(partial(_load_standard_file, profiler=profiler), sources))
+
+    invalid_counts = {}
+    for _, file_counts in results:
+        for sensor, count in file_counts.items():
+            invalid_counts[sensor] = invalid_counts.get(sensor, 0) + count
+
+    if not results:
+        return pd.DataFrame(), invalid_counts
+
+    #Gabung sekali, lalu buang timestamp ganda dari dump logger yang tumpang tindih
+    df_standard = pd.concat([clean_df for clean_df, _ in results], ignore_index=True)
+    df_standard = df_standard.drop_duplicates(subset=df_standard.columns[0], keep='first').reset_index(drop=True)
+    return df_standard, invalid_counts
+
+def prepare_uut(df_uut, logger):
+    # exclude kolom TIMESTAMP dan RECORD dari konversi
+    if logger == "CS":
+        exclude_cols_uut = [df_uut.columns[0],"RECORD"]
+    else:
+        exclude_cols_uut = df_uut.columns[:2]
+
+    return convert_columns_to_float(df_uut, exclude_cols_uut)
+
+def load_uut(source, logger, profiler=None):
+    name = getattr(source, "name", source)
+    with stage(profiler, "parse UUT", file=name) as rec:
+        df_uut = read_uut_csv(source, logger)
+        rec["baris"] = len(df_uut)
+    df_uut.dropna(axis=1, how='all').reset_index(drop=True)
+    with stage(profiler, "konversi float UUT", file=name):
+        return prepare_uut(df_uut, logger)
@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+
+from ingestion import invalid_status_mask
+
+STD_TIME_FORMAT = "%m/%d/%y %I:%M:%S %p"
+MERGE_TOLERANCE = pd.Timedelta('1min')
+
+PARAMETER_CODES = {
+    "Suhu": "TT",
+    "Kelembapan": "RH",
+    "Tekanan": "PP",
+    "Kecepatan Angin": "WS",
+    "Arah Angin": "WD",
+    "Radiasi Matahari": "SR",
+    "Suhu Air": "WT",
+    "Kec. Angin Panci": "OVA",
+}
+
+#Kec. angin panci memakai tabel koreksi kecepatan angin
+TABEL_KOREKSI = {"OVA": "WS"}
+
+#Resolusi agregasi sebelum merge, None berarti data mentah
+RESAMPLE_RULES = {"Tanpa": None, "1 detik": "1s", "10 detik": "10s", "1 menit": "1min"}
+RESAMPLE_METHODS = {"Rerata": "mean", "Nilai terakhir": "last"}
+
+# Fungsi konversi satuan
+def convert_unit(value, from_unit, to_unit):
+    if from_unit == to_unit or "-" in (from_unit, to_unit):
+        return value
+    if from_unit == "InHg" and to_unit == "hPa":
+        return value * 33.86388
+    if from_unit == "hPa" and to_unit == "InHg":
+        return value / 33.86388
+    if from_unit == "m/s" and to_unit == "knot":
+        return value / 0.514444
+    if from_unit == "knot" and to_unit == "m/s":
+        return value * 0.514444
+    return value
+
+def convert_timestamp_column(df, ts_col, time_format=None):
+    df[ts_col] = pd.to_datetime(df[ts_col], format=time_format, errors='coerce')
+    # Hapus baris dengan timestamp yang gagal dikonversi
+    return df.dropna(subset=[ts_col])
+
+def convert_timestamps(df_standard, df_uut, ts_col_std, ts_col_uut):
+    df_standard = convert_timestamp_column(df_standard, ts_col_std, STD_TIME_FORMAT)
+    df_uut = convert_timestamp_column(df_uut, ts_col_uut)
+    return df_standard, df_uut
+
+def apply_corrections(df_standard, params_mapping, id_std, registry):
+    for std_col, uut_col, par_code in params_mapping.values():
+        if par_code == "SR":
+            df_standard[f"SR STD-terkoreksi"] = df_standard[std_col]
+            continue
+        tabel = TABEL_KOREKSI.get(par_code, par_code)
+        #koreksi mengikuti dtype kolom standar (float32) agar kolom turunan tidak melebar ke float64
+        df_standard[f"koreksi-{std_col}"] = np.asarray(registry.terapkan(id_std, tabel, df_standard[std_col]), dtype=df_standard[std_col].dtype)
+        df_standard[f"{par_code} STD-terkoreksi"] = df_standard[std_col] + df_standard[f"koreksi-{std_col}"]
+    return df_standard
+
+def convert_uut_units(df_uut, unit_conversions):
+    #unit_conversions: {kolom UUT: (satuan asal, satuan tujuan)}
+    for uut_col, (from_unit, to_unit) in unit_conversions.items():
+        df_uut[uut_col] = convert_unit(df_uut[uut_col], from_unit, to_unit)
+    return df_uut
+
+def circular_columns(params_mapping):
+    #Kolom arah angin (derajat) di sisi standar dan UUT
+    std_cols, uut_cols = [], []
+    for std_col, uut_col, par_code in params_mapping.values():
+        if par_code == "WD":
+            std_cols += [std_col, "WD STD-terkoreksi"]
+            uut_cols.append(uut_col)
+    return std_cols, uut_cols
+
+def resample_frame(df, ts_col, rule, how="mean", circular_cols=()):
+    #Agregasi per bucket waktu: baris berstatus INVALID dibuang, kolom status/teks
+    #tidak ikut, dan kolom arah (derajat) dirata-rata secara vektor (sin/cos)
+    if rule is None or df.empty:
+        return df
+    status_cols = [col for col in df.columns if col.lower().startswith("stat")]
+    if status_cols:
+        invalid_mask = np.zeros(len(df), dtype=bool)
+        for col in status_cols:
+            invalid_mask |= invalid_status_mask(df[col])
+        df = df[~invalid_mask]
+
+    value_cols = [col for col in df.select_dtypes(include="number").columns if col != ts_col]
+    bucket = df[ts_col].dt.floor(rule).to_numpy()
+    grouped = df[value_cols].groupby(bucket, sort=True)
+    if how == "last":
+        result = grouped.last()
+    else:
+        result = grouped.mean()
+        circular_cols = [col for col in circular_cols if col in value_cols]
+        if circular_cols:
+            rad = np.deg2rad(df[circular_cols])
+            sin_mean = np.sin(rad).groupby(bucket, sort=True).mean()
+            cos_mean = np.cos(rad).groupby(bucket, sort=True).mean()
+            degrees = np.rad2deg(np.arctan2(sin_mean, cos_mean)) % 360
+            for col in circular_cols:
+                #cast ke float32 bisa membulatkan 359.99999 menjadi 360.0, lipat kembali ke 0
+                values = degrees[col].astype(result[col].dtype)
+                result[col] = values.where(values < 360, 0)
+    result.insert(0, ts_col, result.index)
+    return result.reset_index(drop=True)
+
+def merge_data(df_standard, df_uut, ts_col_std, ts_col_uut, header_mapping):
+    df_standard_sorted = df_standard.sort_values(ts_col_std)
+    df_uut_sorted = df_uut.sort_values(ts_col_uut)
+    df_merged = pd.merge_asof(
+        df_standard_sorted,
+        df_uut_sorted,
+        left_on=ts_col_std,
+        right_on=ts_col_uut,
+        direction='nearest',
+        tolerance=MERGE_TOLERANCE
+    )
+
+    # Hapus baris yang memiliki nilai kosong pada kolom hasil mapping
+    cols_to_check = list(header_mapping.keys()) + list(header_mapping.values())
+    return df_merged.dropna(subset=cols_to_check).reset_index(drop=True)
+
+def filter_time_range(df_merged, ts_col_std, start_datetime, end_datetime):
+    times = df_merged[ts_col_std]
+    if times.is_monotonic_increasing:
+        #hasil merge sudah urut waktu: cukup dua binary search dan satu potongan baris
+        i = times.searchsorted(pd.Timestamp(start_datetime), side="left")
+        j = times.searchsorted(pd.Timestamp(end_datetime), side="right")
+        return df_merged.iloc[i:max(i, j)].reset_index(drop=True)
+    mask = (times >= start_datetime)&(times <= end_datetime)
+    return df_merged[mask].reset_index(drop=True)
+
+def koreksi_uut(df, param_key, uut_col, par_code):
+    std_corr_col = f"{par_code} STD-terkoreksi"
+    if (param_key == "Kecepatan Angin"):
+        return (df[std_corr_col] - df[uut_col] + 180) % 360 -180
+    elif (param_key == "Radiasi Matahari"):
+        return pd.Series(np.where(df[uut_col] < 100, np.nan,  df[std_corr_col] / df[uut_col]), index=df.index)
+    return df[std_corr_col] - df[uut_col]
+
+def compare_parameter(df, param_key, std_col, uut_col, par_code, ts_col_std, stats=None):
+    #Tambah kolom koreksi UUT ke df, lalu hitung statistik (jika belum diberikan) dan tabel komparasi
+    std_corr_col = f"{par_code} STD-terkoreksi"
+    koreksi_col = f"koreksi_{uut_col}"
+    df[koreksi_col] = koreksi_uut(df, param_key, uut_col, par_code)
+
+    if stats is None:
+        stats = {
+            "rerata_std": df[std_corr_col].mean(),
+            "stdev_std": df[std_corr_col].std(),
+            "rerata_uut": df[uut_col].mean(),
+            "stdev_uut": df[uut_col].std(),
+            "koreksi": df[koreksi_col].mean(),
+            "stdev_kor": df[koreksi_col].std(),
+            "jumlah": len(df),
+        }
+
+    #seleksi kolom sudah menghasilkan frame baru, tidak perlu .copy() lagi
+    df_summary = df[summary_columns(std_col, uut_col, par_code, ts_col_std)]
+    return stats, df_summary
+
+def summary_columns(std_col, uut_col, par_code, ts_col_std):
+    koreksi_col = f"koreksi_{uut_col}"
+    if std_col.lower().startswith("sr"):
+        return [ts_col_std, f"{std_col}", uut_col, koreksi_col]
+    return [ts_col_std, f"{std_col}",f"koreksi-{std_col}",f"{par_code} STD-terkoreksi", uut_col, koreksi_col]
+
+def report_row(param_key, stats):
+    return {
+        "Parameter":param_key,
+        "Standar":f"{stats['rerata_std']:.2f}",
+        "UUT":f"{stats['rerata_uut']:.2f}",
+        "Koreksi":f"{stats['koreksi']:.2g}",
+        "STDEV":f"{stats['stdev_kor']:.2g}"
+    }
+
+def combine_summaries(df, columns_per_param, ts_col_std):
+    #Tabel gabungan diambil langsung dari df dalam satu seleksi kolom (bukan concat
+    #salinan df_summary), kolom waktu hanya sekali di depan
+    if not columns_per_param:
+        return pd.DataFrame()
+    return df[[ts_col_std] + [col for columns in columns_per_param for col in columns[1:]]]
+
+def run_comparison(df_merged_filtered, params_mapping, ts_col_std, window_stats=None):
+    #window_stats: statistik per parameter yang sudah dihitung WindowStats untuk rentang yang sama
+    results = {}
+    for param_key, (std_col, uut_col, par_code) in params_mapping.items():
+        if std_col in df_merged_filtered.columns and uut_col in df_merged_filtered.columns:
+            stats = window_stats.get(param_key) if window_stats else None
+            results[param_key] = compare_parameter(df_merged_filtered, param_key, std_col, uut_col, par_code, ts_col_std, stats)
+    lhks_df = combine_summaries(df_merged_filtered, [
+        summary_columns(std_col, uut_col, par_code, ts_col_std)
+        for param_key, (std_col, uut_col, par_code) in params_mapping.items() if param_key in results
+    ], ts_col_std)
+    report_df = pd.DataFrame([report_row(param_key, stats) for param_key, (stats, _) in results.items()])
+    return results, lhks_df, report_df
@@ -0,0 +1,97 @@
+"""Instrumentasi ringan per tahap pipeline: waktu, puncak memori dan jumlah baris.
+
+Setiap tahap dibungkus `with profiler.stage("nama") as rec:`; isi rec["baris"]
+bila ada DataFrame yang relevan. Puncak memori diukur dengan tracemalloc dan
+hanya aktif jika diminta karena menambah overhead. tracemalloc hanya menyala
+selama ada tahap ter-trace yang terbuka (dari sesi/thread mana pun) dan hanya
+dimatikan oleh tahap terakhir yang menutup. Puncak tahap bersarang tetap benar
+karena sebelum puncak global di-reset, nilainya dicatat ke semua tahap yang
+masih terbuka; alokasi tahap paralel tetap ikut terhitung, jadi angkanya perkiraan.
+"""
+import os
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+import pandas as pd
+
+#KALIBRASI_PROFILE_LOG="" mematikan log JSON lines dari aplikasi
+PROFILE_LOG = os.environ.get("KALIBRASI_PROFILE_LOG", "profiling.jsonl")
+
+_TRACE_LOCK = threading.Lock()
+_open_trackers = [] #tahap ter-trace yang masih terbuka, lintas profiler dan thread
+_owns_tracing = False
+
+class _PeakTracker:
+    __slots__ = ("start", "peak")
+
+def _enter_traced():
+    global _owns_tracing
+    tracker = _PeakTracker()
+    with _TRACE_LOCK:
+        if not _open_trackers and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _owns_tracing = True
+        current, peak = tracemalloc.get_traced_memory()
+        for open_tracker in _open_trackers:
+            open_tracker.peak = max(open_tracker.peak, peak)
+        tracemalloc.reset_peak()
+        tracker.start = tracker.peak = current
+        _open_trackers.append(tracker)
+    return tracker
+
+def _exit_traced(tracker):
+    global _owns_tracing
+    with _TRACE_LOCK:
+        peak = tracemalloc.get_traced_memory()[1]
+        for open_tracker in _open_trackers:
+            open_tracker.peak = max(open_tracker.peak, peak)
+        _open_trackers.remove(tracker)
+        if not _open_trackers and _owns_tracing:
+            tracemalloc.stop()
+            _owns_tracing = False
+    return (tracker.peak - tracker.start) / 2**20
+
+class StageProfiler:
+    def __init__(self, trace_memory=False, run_id=None):
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        self.trace_memory = trace_memory
+        self.records = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, **info):
+        record = {"tahap": name, **info}
+        tracker = _enter_traced() if self.trace_memory else None
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["detik"] = time.perf_counter() - start
+            if tracker is not None:
+                record["puncak_mb"] = _exit_traced(tracker)
+            record["thread"] = threading.current_thread().name
+            with self._lock:
+                self.records.append(record)
+
+    def frame(self):
+        columns = ["tahap", "detik", "puncak_mb", "baris"]
+        df = pd.DataFrame(self.records)
+        return df[[col for col in columns if col in df.columns] + [col for col in df.columns if col not in columns]]
+
+    def write_jsonl(self, path=PROFILE_LOG):
+        #Satu baris JSON per tahap agar mudah di-grep / dibaca pandas.read_json(lines=True)
+        waktu = datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            records = list(self.records)
+        lines = "".join(json.dumps({"run_id": self.run_id, "waktu": waktu, **record}, default=str) + "\n" for record in records)
+        #satu kali write (mode append) agar baris dari beberapa proses batch tidak tercampur
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+def stage(profiler, name, **info):
+    #Dipakai di modul pipeline: tanpa profiler tetap menghasilkan dict agar rec["baris"] aman
+    return profiler.stage(name, **info) if profiler is not None else nullcontext({})
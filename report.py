@@ -0,0 +1,200 @@
+import io
+import os
+import math
+import base64
+import hashlib
+import threading
+from functools import lru_cache
+from collections import OrderedDict
+
+import openpyxl
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from jinja2 import Template
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from columnar_cache import to_parquet_bytes
+from downsample import minmax_downsample
+
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+EXCEL_MAX_ROWS = 1048576
+EXPORT_FORMATS = {
+    "xlsx": XLSX_MIME,
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+#Gambar dirender lewat canvas Agg tanpa pyplot (tidak ada figure global yang bocor),
+#satu figure dipakai ulang per thread dan hasil PNG di-memo berdasarkan hash data
+IMAGE_CACHE_SIZE = 64
+_canvas = threading.local()
+_image_cache = OrderedDict()
+_image_lock = threading.Lock()
+
+def _shared_figure():
+    fig = getattr(_canvas, "figure", None)
+    if fig is None:
+        fig = Figure(figsize=(15, 7))
+        FigureCanvasAgg(fig)
+        _canvas.figure = fig
+    fig.clear()
+    return fig
+
+def _frame_digest(df):
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return hashlib.sha1(hashes.tobytes() + repr(list(df.columns)).encode()).hexdigest()
+
+def _memo_image(key, render):
+    with _image_lock:
+        image = _image_cache.get(key)
+        if image is not None:
+            _image_cache.move_to_end(key)
+            return image
+    image = render()
+    with _image_lock:
+        _image_cache[key] = image
+        while len(_image_cache) > IMAGE_CACHE_SIZE:
+            _image_cache.popitem(last=False)
+    return image
+
+def clear_image_cache():
+    with _image_lock:
+        _image_cache.clear()
+
+def convertPlotToBase64(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    buf.seek(0)
+    return base64.b64encode(buf.read()).decode()
+
+def plot_parameter(df, param, std_col, uut_col, fig=None, unit_name=""):
+    data = df
+
+    fig = fig or _shared_figure()
+    ax = fig.subplots()
+    ax.plot(data["Timestamp"], data[std_col], label="Standard")
+    ax.plot(data["Timestamp"], data[uut_col], label="UUT")
+
+    ax.set_title(f"Grafik Tren {param} - {unit_name}" if unit_name else f"Grafik Tren {param}")
+    ax.legend()
+    ax.grid(True)
+
+    return fig
+
+def plot_trend(df, ts_col_std, param_key, uut_col, par_code, fig=None):
+    fig = fig or _shared_figure()
+    ax = fig.subplots()
+    sns.lineplot(x=df[ts_col_std], y=df[f"{par_code} STD-terkoreksi"], label=f"{par_code} Standar", ax=ax, linewidth=2.5)
+    sns.lineplot(x=df[ts_col_std], y=df[uut_col], label=f"{par_code} UUT", ax=ax, linewidth=2.5)
+
+    ax.set_title(f" Grafik Tren {param_key} Standar vs UUT")
+    ax.legend()
+    ax.grid(True)
+    ax.tick_params(axis="x", labelrotation=45)
+    return fig
+
+def figure_to_png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    fig.clear() #lepas referensi data dari figure bersama
+    buf.seek(0)
+    return buf
+
+def trend_png(df, ts_col_std, param_key, uut_col, par_code):
+    key = ("trend", param_key, uut_col, par_code, _frame_digest(df))
+    png = _memo_image(key, lambda: figure_to_png(plot_trend(df, ts_col_std, param_key, uut_col, par_code)).getvalue())
+    return io.BytesIO(png)
+
+def decimal_floats(df):
+    #Kolom float32 dilebarkan lewat representasi desimal terpendeknya, bukan cast biner,
+    #agar 1008.1 tetap tampil 1008.1 (bukan 1008.0999755859375) di Excel dan tabel UI.
+    #Konversi per nilai unik karena pembacaan sensor berulang pada resolusinya
+    float32_positions = np.flatnonzero(df.dtypes == "float32")
+    if len(float32_positions) == 0:
+        return df
+    df = df.copy(deep=False)
+    for i in float32_positions:
+        codes, uniques = pd.factorize(df.iloc[:, i])
+        decimals = np.append(np.asarray(uniques).astype(str).astype("float64"), np.nan)
+        df.isetitem(i, decimals[codes]) #kode -1 (NaN) jatuh ke elemen terakhir
+    return df
+
+def to_excel_bytes(df, sheet_name):
+    #Workbook write-only (streaming), data melebihi batas baris Excel dipecah ke sheet berikutnya
+    workbook = openpyxl.Workbook(write_only=True)
+    rows_per_sheet = EXCEL_MAX_ROWS - 1
+    df = decimal_floats(df)
+    values = df.astype(object).where(df.notna(), None)
+    header = [str(col) for col in df.columns]
+    for i in range(max(1, math.ceil(len(df) / rows_per_sheet))):
+        worksheet = workbook.create_sheet(sheet_name if i == 0 else f"{sheet_name} ({i+1})")
+        worksheet.append(header)
+        for row in values.iloc[i*rows_per_sheet:(i+1)*rows_per_sheet].itertuples(index=False, name=None):
+            worksheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+def to_csv_bytes(df):
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+def export_bytes(df, fmt, sheet_name="Data"):
+    if fmt == "xlsx":
+        return to_excel_bytes(df, sheet_name)
+    if fmt == "csv":
+        return to_csv_bytes(df)
+    if fmt == "parquet":
+        return to_parquet_bytes(df)
+    raise ValueError(f"Format ekspor tidak dikenal: {fmt}")
+
+@lru_cache(maxsize=8)
+def _compiled_template(path, mtime):
+    with open(path) as f:
+        return Template(f.read())
+
+def load_template(path="report.html"):
+    #Template dikompilasi sekali, dikompilasi ulang hanya jika file berubah
+    return _compiled_template(os.path.abspath(path), os.path.getmtime(path))
+
+def plot_series(df, ts_col_std, params_mapping):
+    #Satu seri tereduksi per parameter, dipakai bersama oleh grafik unduhan dan laporan
+    series = {}
+    for param, (std_col, uut_col, par_code) in params_mapping.items():
+        cols = list(dict.fromkeys([ts_col_std, std_col, f"{par_code} STD-terkoreksi", uut_col]))
+        if all(col in df.columns for col in cols):
+            series[param] = minmax_downsample(df[cols], ts_col_std, cols[1:])
+    return series
+
+def report_plots(series, params_mapping, unit_name=""):
+    #unit_name ikut di judul grafik agar grafik tiap UUT di laporan multi-UUT bisa dibedakan
+    plots_base64 = []
+    for param, param_item in params_mapping.items():
+        if param not in series:
+            continue
+        df, std_col, uut_col = series[param], param_item[0], param_item[1]
+        key = ("report", param, std_col, uut_col, unit_name, _frame_digest(df))
+        plots_base64.append(_memo_image(key, lambda: f"data:image/png;base64,{_plot_base64(df, param, std_col, uut_col, unit_name)}"))
+    return plots_base64
+
+def _plot_base64(df, param, std_col, uut_col, unit_name=""):
+    fig = plot_parameter(df, param, std_col, uut_col, unit_name=unit_name)
+    img = convertPlotToBase64(fig)
+    fig.clear()
+    return img
+
+def render_report(template, subtitle, info, report_df, plots_base64):
+    #report_df dan plots_base64 boleh berupa dict {nama UUT: ...} untuk satu bagian per UUT
+    tables = report_df if isinstance(report_df, dict) else {"": report_df}
+    plots = plots_base64 if isinstance(plots_base64, dict) else {"": plots_base64}
+    return template.render(
+        subtitle = subtitle,
+        info = info,
+        summary_tables=[(name, df.to_html(index=False)) for name, df in tables.items()],
+        plot_groups=list(plots.items())
+    )
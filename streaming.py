@@ -0,0 +1,168 @@
+"""Mode streaming untuk log berukuran besar (berminggu-minggu data 1 Hz).
+
+Data standar dan UUT dibaca per potongan (chunk) berurutan waktu, dibersihkan
+dan dikoreksi per potongan, lalu digabung dengan merge_asof berjendela sehingga
+toleransi 1 menit tetap berlaku di batas antar potongan. Rerata dan simpangan
+baku dihitung satu lintasan, jadi memori yang dipakai sebanding ukuran chunk,
+bukan panjang kampanye. File harus berurutan waktu (seperti dump logger).
+"""
+import numpy as np
+import pandas as pd
+
+from ingestion import read_standard_csv, read_uut_csv, std_header, invalid_status_mask, convert_columns_to_float, prepare_uut
+from pipeline import STD_TIME_FORMAT, MERGE_TOLERANCE, apply_corrections, convert_uut_units, koreksi_uut, report_row
+
+DEFAULT_CHUNKSIZE = 200000
+
+class RunningStats:
+    """Rerata dan simpangan baku (ddof=1) satu lintasan, digabung per batch (Welford/Chan)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        n = len(values)
+        if n == 0:
+            return
+        batch_mean = values.mean()
+        batch_m2 = ((values - batch_mean) ** 2).sum()
+        total = self.count + n
+        delta = batch_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += batch_m2 + delta ** 2 * self.count * n / total
+        self.count = total
+
+    @property
+    def result_mean(self):
+        return self.mean if self.count else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+def _first_timestamp(source):
+    #TextFileReader harus ditutup, kalau tidak file handle bocor per file standar
+    with read_standard_csv(source, chunksize=1) as reader:
+        first = reader.get_chunk()
+    return pd.to_datetime(first.iloc[0, 0], format=STD_TIME_FORMAT, errors='coerce')
+
+def _unused_sensor_columns(source, chunksize):
+    #Lintasan pertama hanya membaca kolom status: sensor yang statusnya INVALID di
+    #seluruh file dibuang kolomnya (sama seperti clean_std_df), bukan baris datanya
+    with read_standard_csv(source, chunksize=1) as reader:
+        header = reader.get_chunk().columns
+    renamed = dict(zip(header, std_header(header)))
+    status_cols = [col for col in header if renamed[col].lower().startswith("stat")]
+    if not status_cols:
+        return []
+    all_invalid = {renamed[col]: True for col in status_cols}
+    with read_standard_csv(source, chunksize=chunksize, usecols=status_cols) as reader:
+        for chunk in reader:
+            for col in status_cols:
+                if all_invalid[renamed[col]] and not (chunk[col] == "INVALID").all():
+                    all_invalid[renamed[col]] = False
+    invalid_stat_columns = [col for col, flag in all_invalid.items() if flag]
+    sensor_columns = [col.replace('Stat_', '') for col in invalid_stat_columns]
+    return invalid_stat_columns + [col for col in sensor_columns if col in renamed.values()]
+
+def iter_standard(sources, ts_col_std="Timestamp", chunksize=DEFAULT_CHUNKSIZE):
+    last_ts = None
+    for source in sorted(sources, key=_first_timestamp):
+        drop_cols = _unused_sensor_columns(source, chunksize)
+        with read_standard_csv(source, chunksize=chunksize) as reader:
+            for chunk in reader:
+                chunk.columns = std_header(chunk.columns)
+                chunk = chunk.drop(columns=[col for col in drop_cols if col in chunk.columns])
+                status_cols = [col for col in chunk.columns if col.lower().startswith("stat")]
+                invalid_mask = np.zeros(len(chunk), dtype=bool)
+                for col in status_cols:
+                    invalid_mask |= invalid_status_mask(chunk[col])
+                chunk = convert_columns_to_float(chunk[~invalid_mask].copy(), [chunk.columns[0]] + status_cols)
+
+                chunk[ts_col_std] = pd.to_datetime(chunk[ts_col_std], format=STD_TIME_FORMAT, errors='coerce')
+                chunk = chunk.dropna(subset=[ts_col_std]).sort_values(ts_col_std)
+                if last_ts is not None:
+                    chunk = chunk[chunk[ts_col_std] > last_ts] #timestamp tumpang tindih antar dump logger
+                if chunk.empty:
+                    continue
+                last_ts = chunk[ts_col_std].iloc[-1]
+                yield chunk
+
+def iter_uut(source, logger, ts_col_uut, unit_conversions=None, chunksize=DEFAULT_CHUNKSIZE):
+    with read_uut_csv(source, logger, chunksize=chunksize) as reader:
+        for chunk in reader:
+            chunk = prepare_uut(chunk, logger)
+            chunk[ts_col_uut] = pd.to_datetime(chunk[ts_col_uut], errors='coerce')
+            chunk = chunk.dropna(subset=[ts_col_uut]).sort_values(ts_col_uut)
+            yield convert_uut_units(chunk, unit_conversions or {})
+
+def stream_merge(std_chunks, uut_chunks, ts_col_std, ts_col_uut, tolerance=MERGE_TOLERANCE):
+    #UUT ditahan dalam buffer yang mencakup [awal chunk - toleransi, akhir chunk + toleransi]
+    uut_iter = iter(uut_chunks)
+    buffer = None
+    exhausted = False
+    for std_chunk in std_chunks:
+        t_end = std_chunk[ts_col_std].iloc[-1] + tolerance
+        while not exhausted and (buffer is None or buffer.empty or buffer[ts_col_uut].iloc[-1] <= t_end):
+            try:
+                next_chunk = next(uut_iter)
+            except StopIteration:
+                exhausted = True
+                break
+            buffer = next_chunk if buffer is None else pd.concat([buffer, next_chunk], ignore_index=True)
+        if buffer is None:
+            return
+
+        yield pd.merge_asof(
+            std_chunk,
+            buffer,
+            left_on=ts_col_std,
+            right_on=ts_col_uut,
+            direction='nearest',
+            tolerance=tolerance
+        )
+        t_keep = std_chunk[ts_col_std].iloc[-1] - tolerance
+        buffer = buffer[buffer[ts_col_uut] >= t_keep]
+
+def stream_comparison(standard_sources, uut_source, logger, params_mapping, id_std, registry,
+                      ts_col_std="Timestamp", ts_col_uut="TIMESTAMP", unit_conversions=None,
+                      start=None, end=None, chunksize=DEFAULT_CHUNKSIZE):
+    header_mapping = {std_col: uut_col for std_col, uut_col, _ in params_mapping.values()}
+    cols_to_check = list(header_mapping.keys()) + list(header_mapping.values())
+    accumulators = {param: {"std": RunningStats(), "uut": RunningStats(), "kor": RunningStats()} for param in params_mapping}
+    n_rows = 0
+
+    std_chunks = (apply_corrections(chunk, params_mapping, id_std, registry)
+                  for chunk in iter_standard(standard_sources, ts_col_std, chunksize))
+    uut_chunks = iter_uut(uut_source, logger, ts_col_uut, unit_conversions, chunksize)
+    for merged in stream_merge(std_chunks, uut_chunks, ts_col_std, ts_col_uut):
+        merged = merged.dropna(subset=cols_to_check)
+        if start is not None:
+            merged = merged[merged[ts_col_std] >= start]
+        if end is not None:
+            merged = merged[merged[ts_col_std] <= end]
+        n_rows += len(merged)
+        for param_key, (std_col, uut_col, par_code) in params_mapping.items():
+            acc = accumulators[param_key]
+            acc["std"].update(merged[f"{par_code} STD-terkoreksi"])
+            acc["uut"].update(merged[uut_col])
+            acc["kor"].update(koreksi_uut(merged, param_key, uut_col, par_code))
+
+    results = {
+        param_key: {
+            "rerata_std": acc["std"].result_mean,
+            "stdev_std": acc["std"].std,
+            "rerata_uut": acc["uut"].result_mean,
+            "stdev_uut": acc["uut"].std,
+            "koreksi": acc["kor"].result_mean,
+            "stdev_kor": acc["kor"].std,
+            "jumlah": acc["std"].count,
+        }
+        for param_key, acc in accumulators.items()
+    }
+    report_df = pd.DataFrame([report_row(param_key, stats) for param_key, stats in results.items()])
+    return results, report_df, n_rows
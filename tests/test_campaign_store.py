@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from campaign_store import CampaignStore
+
+def frame(start, periods):
+    ts = pd.date_range(start, periods=periods, freq="1s")
+    return pd.DataFrame({
+        "Timestamp": ts,
+        "Stat_TA": pd.Categorical(["OK"] * periods),
+        "TA": np.linspace(20, 30, periods).astype("float32"),
+    })
+
+def test_ingest_counts_only_incoming_rows(tmp_path):
+    store = CampaignStore(str(tmp_path))
+    df = frame("2025-05-01 23:00:00", 7200) #melewati tengah malam: dua partisi hari
+    assert store.ingest("standar", "AWS-1", df, "Timestamp") == 7200
+    assert store.days("standar", "AWS-1") == ["2025-05-01", "2025-05-02"]
+
+    ulang = df.iloc[:1000].copy()
+    ulang["TA"] = ulang["TA"] + np.float32(1)
+    assert store.ingest("standar", "AWS-1", ulang, "Timestamp") == 1000
+    loaded = store.load_range("standar", "AWS-1")
+    assert len(loaded) == 7200
+    assert loaded["TA"].iloc[0] == ulang["TA"].iloc[0]
+
+def test_load_range_matches_filter(tmp_path):
+    store = CampaignStore(str(tmp_path))
+    df = frame("2025-05-01 22:00:00", 4 * 3600)
+    store.ingest("standar", "AWS-1", df, "Timestamp")
+    start, end = pd.Timestamp("2025-05-01 23:30"), pd.Timestamp("2025-05-02 00:30")
+    expected = df[(df["Timestamp"] >= start) & (df["Timestamp"] <= end)].reset_index(drop=True)
+    pd.testing.assert_frame_equal(store.load_range("standar", "AWS-1", start, end), expected)
@@ -0,0 +1,39 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import columnar_cache
+from columnar_cache import cache_key, load_frame, prune_cache, save_frame
+
+def test_cache_key_depends_on_version(monkeypatch):
+    key = cache_key("standard", ("abc",))
+    monkeypatch.setattr(columnar_cache, "CACHE_VERSION", columnar_cache.CACHE_VERSION + 1)
+    assert cache_key("standard", ("abc",)) != key
+
+def test_roundtrip_keeps_dtypes(tmp_path):
+    df = pd.DataFrame({"TA": pd.Series([22.9, 23.1], dtype="float32"), "Stat_TA": pd.Categorical(["OK", "INVALID"])})
+    assert save_frame("standard-x", df, meta={"TA": 1}, cache_dir=str(tmp_path))
+    loaded, meta = load_frame("standard-x", cache_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(loaded, df)
+    assert meta == {"TA": 1}
+
+def test_prune_removes_least_recently_used(tmp_path):
+    df = pd.DataFrame({"x": range(10_000)})
+    for i, key in enumerate(["a", "b", "c"]):
+        save_frame(key, df, cache_dir=str(tmp_path))
+        os.utime(tmp_path / f"{key}.feather", (time.time() - 100 + i, time.time() - 100 + i))
+    load_frame("a", cache_dir=str(tmp_path)) #"a" baru dipakai, "b" jadi yang paling lama
+    size = os.path.getsize(tmp_path / "a.feather")
+    prune_cache(str(tmp_path), max_bytes=2 * size)
+    assert sorted(os.listdir(tmp_path)) == ["a.feather", "c.feather"]
+
+def test_concurrent_saves_same_key(tmp_path):
+    #thread sesi berbeda dalam satu proses menulis kunci yang sama
+    frames = [pd.DataFrame({"x": range(i, i + 50_000)}) for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(pool.map(lambda df: save_frame("shared", df, cache_dir=str(tmp_path)), frames))
+    loaded, _ = load_frame("shared", cache_dir=str(tmp_path))
+    assert any(loaded.equals(df) for df in frames)
+    assert os.listdir(tmp_path) == ["shared.feather"]
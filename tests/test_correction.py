@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.interpolate import interp1d
+
+from correction import CorrectionRegistry
+
+CORRECTION_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "correction.json")
+REGISTRY = CorrectionRegistry(CORRECTION_PATH)
+
+def cari_koreksi_scipy(db_koreksi, id_aws, parameter, nilai_baca):
+    #Implementasi lama di app.py (interp1d per pemanggilan), dipakai sebagai acuan
+    daftar_koreksi = sorted(db_koreksi[id_aws][parameter], key=lambda x: x['setpoin'])
+    setpoints = [item['setpoin'] for item in daftar_koreksi]
+    koreksis = [item['koreksi'] for item in daftar_koreksi]
+    interpolator = interp1d(setpoints, koreksis, kind='linear', fill_value=(koreksis[0], koreksis[-1]), bounds_error=False)
+    return interpolator(nilai_baca)
+
+def nilai_uji(setpoints, rng):
+    span = setpoints[-1] - setpoints[0] or 1.0
+    return np.concatenate([
+        setpoints,                                                     #tepat di setpoin
+        rng.uniform(setpoints[0], setpoints[-1], 200),                 #di dalam tabel
+        rng.uniform(setpoints[0] - span, setpoints[0], 50),            #di bawah tabel
+        rng.uniform(setpoints[-1], setpoints[-1] + span, 50),          #di atas tabel
+        [np.nan],
+    ])
+
+@pytest.mark.parametrize("id_aws,parameter", [(id_aws, parameter) for id_aws in REGISTRY.ids() for parameter in REGISTRY.data[id_aws]])
+def test_terapkan_sama_dengan_interp1d(id_aws, parameter):
+    setpoints, _ = REGISTRY.tabel(id_aws, parameter)
+    values = nilai_uji(setpoints, np.random.default_rng(0))
+
+    expected = np.array([cari_koreksi_scipy(REGISTRY.data, id_aws, parameter, x) for x in values], dtype=float)
+    actual = np.asarray(REGISTRY.terapkan(id_aws, parameter, pd.Series(values)), dtype=float)
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-12, equal_nan=True)
+    assert np.isnan(actual[-1])
+
+def test_terapkan_nilai_tunggal():
+    id_aws = REGISTRY.ids()[0]
+    parameter = next(iter(REGISTRY.data[id_aws]))
+    setpoints, _ = REGISTRY.tabel(id_aws, parameter)
+    x = float(setpoints.mean())
+    assert float(REGISTRY.terapkan(id_aws, parameter, x)) == pytest.approx(float(cari_koreksi_scipy(REGISTRY.data, id_aws, parameter, x)), abs=1e-12)
+
+def test_refresh_keeps_previous_tables_on_invalid_file(tmp_path):
+    path = tmp_path / "correction.json"
+    path.write_text('{"AWS-X": {"TT": [{"setpoin": 0, "koreksi": 0.1}, {"setpoin": 10, "koreksi": 0.3}]}}')
+    registry = CorrectionRegistry(str(path))
+    digest = registry.digest
+
+    path.write_text('{"AWS-X": {"TT": [{"setpoin": 0')
+    os.utime(path, ns=(os.stat(path).st_mtime_ns + 10**9,) * 2)
+    with pytest.raises(ValueError):
+        registry.refresh()
+    assert registry.digest == digest
+    assert float(registry.terapkan("AWS-X", "TT", 5.0)) == pytest.approx(0.2)
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline import resample_frame
+
+def frame(times, **columns):
+    return pd.DataFrame({"Timestamp": pd.to_datetime(times), **columns})
+
+def test_circular_mean_wraps_to_zero_in_float32():
+    df = frame(["2025-05-01 00:00:00", "2025-05-01 00:00:30"], WD=np.array([350, 10], dtype="float32"))
+    result = resample_frame(df, "Timestamp", "1min", "mean", ["WD"])
+    assert result["WD"].dtype == np.float32
+    assert result["WD"].tolist() == [0.0]
+
+def test_circular_mean_per_bucket():
+    df = frame(["2025-05-01 00:00:00", "2025-05-01 00:00:30", "2025-05-01 00:01:00", "2025-05-01 00:01:30"],
+               WD=np.array([340, 0, 80, 100], dtype="float32"), TA=np.array([20, 22, 24, 26], dtype="float32"))
+    result = resample_frame(df, "Timestamp", "1min", "mean", ["WD"])
+    assert result["Timestamp"].tolist() == list(pd.to_datetime(["2025-05-01 00:00", "2025-05-01 00:01"]))
+    assert result["WD"].tolist() == pytest.approx([350.0, 90.0], abs=1e-4)
+    assert result["TA"].tolist() == [21.0, 25.0] #kolom biasa tetap rerata aritmetika
+
+def test_invalid_rows_and_status_columns_dropped():
+    df = frame(["2025-05-01 00:00:00", "2025-05-01 00:00:10", "2025-05-01 00:00:20"],
+               Stat_TA=pd.Categorical(["OK", "INVALID", "OK"]), TA=np.array([20, 99, 22], dtype="float32"))
+    result = resample_frame(df, "Timestamp", "1min")
+    assert list(result.columns) == ["Timestamp", "TA"]
+    assert result["TA"].tolist() == [21.0]
+
+def test_last_takes_final_value_without_circular_mean():
+    df = frame(["2025-05-01 00:00:00", "2025-05-01 00:00:30", "2025-05-01 00:00:50"],
+               WD=np.array([350, 10, 355], dtype="float32"))
+    result = resample_frame(df, "Timestamp", "1min", "last", ["WD"])
+    assert result["WD"].tolist() == [355.0]
+
+def test_no_rule_returns_frame_unchanged():
+    df = frame(["2025-05-01 00:00:00"], TA=np.array([20], dtype="float32"))
+    assert resample_frame(df, "Timestamp", None) is df
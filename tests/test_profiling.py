@@ -0,0 +1,32 @@
+import tracemalloc
+
+import numpy as np
+
+from profiling import StageProfiler
+
+MB = 2**20
+
+def test_nested_stage_keeps_outer_peak():
+    profiler = StageProfiler(trace_memory=True)
+    with profiler.stage("luar"):
+        besar = np.ones(40 * MB, dtype=np.uint8)
+        del besar
+        with profiler.stage("dalam"):
+            kecil = np.ones(MB, dtype=np.uint8)
+            del kecil
+    puncak = {record["tahap"]: record["puncak_mb"] for record in profiler.records}
+    assert puncak["luar"] >= 40
+    assert 1 <= puncak["dalam"] < 40
+    assert not tracemalloc.is_tracing()
+
+def test_tracing_stays_on_while_another_profiler_stage_is_open():
+    traced, untraced = StageProfiler(trace_memory=True), StageProfiler(trace_memory=False)
+    with traced.stage("sesi panel aktif"):
+        with untraced.stage("sesi panel mati"):
+            pass
+        assert tracemalloc.is_tracing()
+        data = np.ones(8 * MB, dtype=np.uint8)
+        del data
+    assert traced.records[0]["puncak_mb"] >= 8
+    assert "puncak_mb" not in untraced.records[0]
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,49 @@
+import io
+
+import openpyxl
+
+from ingestion import load_standard
+from report import decimal_floats, to_excel_bytes
+
+STANDARD_CSV = (
+    "Date Time;;TA;;PP\n"
+    ";;degC;;hPa\n"
+    "05/01/25 12:00:00 AM;OK;22,9;OK;1008,1\n"
+    "05/01/25 12:00:01 AM;OK;25,164;OK;1007,902\n"
+    "05/01/25 12:00:02 AM;OK;;OK;1008,192\n"
+)
+
+def test_excel_cells_match_csv_values():
+    df_standard, _ = load_standard([io.BytesIO(STANDARD_CSV.encode())])
+    assert (df_standard[["TA", "PP"]].dtypes == "float32").all()
+
+    workbook = openpyxl.load_workbook(to_excel_bytes(df_standard, "Data"))
+    rows = list(workbook["Data"].iter_rows(values_only=True))
+    header = list(rows[0])
+    ta = [row[header.index("TA")] for row in rows[1:]]
+    pp = [row[header.index("PP")] for row in rows[1:]]
+    assert ta == [22.9, 25.164, None]
+    assert pp == [1008.1, 1007.902, 1008.192]
+
+def test_decimal_floats_keeps_other_columns():
+    df_standard, _ = load_standard([io.BytesIO(STANDARD_CSV.encode())])
+    widened = decimal_floats(df_standard)
+    assert (widened[["TA", "PP"]].dtypes == "float64").all()
+    assert widened["PP"].tolist() == [1008.1, 1007.902, 1008.192]
+    assert (widened.drop(columns=["TA", "PP"]).dtypes == df_standard.drop(columns=["TA", "PP"]).dtypes).all()
+    assert (df_standard[["TA", "PP"]].dtypes == "float32").all() #frame asli tidak diubah
+
+def test_report_groups_plots_per_unit():
+    import os
+    import pandas as pd
+    from report import load_template, render_report
+
+    template = load_template(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "report.html"))
+    ringkasan = pd.DataFrame({"Parameter": ["Suhu"], "Koreksi": [0.1]})
+    html = render_report(template, "uji", "info", {"UUT A": ringkasan, "UUT B": ringkasan},
+                         {"UUT A": ["data:image/png;base64,AAA"], "UUT B": ["data:image/png;base64,BBB"]})
+    grafik = html[html.index("Grafik Perbandingan"):]
+    assert grafik.index("<h3>UUT A</h3>") < grafik.index("AAA") < grafik.index("<h3>UUT B</h3>") < grafik.index("BBB")
+
+    tunggal = render_report(template, "uji", "info", ringkasan, ["data:image/png;base64,CCC"])
+    assert "CCC" in tunggal and "<h3>" not in tunggal
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmark import SENSORS, generate_standard_csv, generate_uut_csv
+from correction import CorrectionRegistry
+from ingestion import load_standard, load_uut
+from pipeline import apply_corrections, convert_timestamps, convert_uut_units, filter_time_range, merge_data, run_comparison
+from streaming import RunningStats, iter_standard, stream_comparison
+from test_correction import CORRECTION_PATH
+
+N_SECONDS = 2 * 3600
+PARAMS_MAPPING = {param: [std_col, uut_col, code] for std_col, uut_col, param, code in SENSORS}
+UNIT_CONVERSIONS = {"PA": ["InHg", "hPa"]}
+ID_STD = "AWS-1"
+
+@pytest.fixture(scope="module")
+def campaign(tmp_path_factory):
+    #Dua file standar yang tumpang tindih 10 menit dan UUT CS dengan celah 20 menit
+    base = tmp_path_factory.mktemp("kampanye")
+    full_std = base / "standar-penuh.csv"
+    generate_standard_csv(full_std, N_SECONDS)
+    lines = full_std.read_text().splitlines(keepends=True)
+    header, rows = lines[:2], lines[2:]
+    std_a, std_b = base / "standar-a.csv", base / "standar-b.csv"
+    std_a.write_text("".join(header + rows[:4200]))
+    std_b.write_text("".join(header + rows[3600:]))
+
+    uut = base / "uut.csv"
+    generate_uut_csv(uut, "CS", N_SECONDS)
+    lines = uut.read_text().splitlines(keepends=True)
+    header, rows = lines[:4], lines[4:]
+    uut.write_text("".join(header + rows[:2400] + rows[3600:]))
+    #urutan file sengaja terbalik: mode streaming mengurutkan menurut timestamp pertama
+    return [str(std_b), str(std_a)], str(uut)
+
+def in_memory(standard_files, uut_file, registry, start, end):
+    #Jalur in-memory seperti batch.process_site_in_memory tanpa resample
+    header_mapping = {std_col: uut_col for std_col, uut_col, _ in PARAMS_MAPPING.values()}
+    df_standard, _ = load_standard(standard_files)
+    df_uut = load_uut(uut_file, "CS")
+    df_standard, df_uut = convert_timestamps(df_standard, df_uut, "Timestamp", "TIMESTAMP")
+    df_standard = apply_corrections(df_standard, PARAMS_MAPPING, ID_STD, registry)
+    df_uut = convert_uut_units(df_uut, UNIT_CONVERSIONS)
+    df_merged = merge_data(df_standard, df_uut, "Timestamp", "TIMESTAMP", header_mapping)
+    df_merged = filter_time_range(df_merged, "Timestamp", start or df_merged["Timestamp"].min(), end or df_merged["Timestamp"].max())
+    results, _, _ = run_comparison(df_merged, PARAMS_MAPPING, "Timestamp")
+    return {param_key: stats for param_key, (stats, _) in results.items()}, len(df_merged)
+
+#chunk lebih pendek dari toleransi merge (60 detik) menguji jendela yang melintasi banyak chunk
+@pytest.mark.parametrize("chunksize", [37, 333, 5000])
+@pytest.mark.parametrize("start,end", [(None, None), (pd.Timestamp("2025-05-01 00:30"), pd.Timestamp("2025-05-01 01:20"))])
+def test_stream_comparison_matches_in_memory(campaign, chunksize, start, end):
+    standard_files, uut_file = campaign
+    registry = CorrectionRegistry(CORRECTION_PATH)
+    expected, expected_rows = in_memory(standard_files, uut_file, registry, start, end)
+    results, _, n_rows = stream_comparison(
+        standard_files, uut_file, "CS", PARAMS_MAPPING, ID_STD, registry,
+        ts_col_std="Timestamp", ts_col_uut="TIMESTAMP", unit_conversions=UNIT_CONVERSIONS,
+        start=start, end=end, chunksize=chunksize,
+    )
+    assert n_rows == expected_rows
+    assert 0 < n_rows < N_SECONDS #celah UUT tidak ikut tergabung
+    for param_key, stats in expected.items():
+        for name, value in stats.items():
+            if name == "jumlah":
+                assert results[param_key][name] == value, (param_key, name)
+            else:
+                assert results[param_key][name] == pytest.approx(value, rel=1e-5, abs=1e-6, nan_ok=True), (param_key, name)
+
+def test_streaming_drops_the_same_columns_as_cleaning(campaign):
+    standard_files, _ = campaign
+    df_standard, _ = load_standard(standard_files)
+    first_chunk = next(iter_standard(standard_files, chunksize=50))
+    assert list(first_chunk.columns) == list(df_standard.columns)
+    assert "XX" not in first_chunk.columns
+
+def test_running_stats_matches_numpy():
+    rng = np.random.default_rng(1)
+    values = rng.normal(1008, 0.5, 10_000)
+    values[rng.random(len(values)) < 0.05] = np.nan
+    stats = RunningStats()
+    for batch in np.array_split(values, np.sort(rng.choice(len(values), 40, replace=False))):
+        stats.update(batch)
+    valid = values[~np.isnan(values)]
+    assert stats.count == len(valid)
+    assert stats.result_mean == pytest.approx(np.mean(valid), rel=1e-12)
+    assert stats.std == pytest.approx(np.std(valid, ddof=1), rel=1e-9)
+
+def test_running_stats_small_samples():
+    stats = RunningStats()
+    assert np.isnan(stats.result_mean) and np.isnan(stats.std)
+    stats.update([np.nan])
+    stats.update([5.0])
+    assert stats.result_mean == 5.0 and np.isnan(stats.std)
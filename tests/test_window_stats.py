@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from window_stats import ALASAN_DATA_PENDEK, ALASAN_TANPA_STATISTIK, WindowStats, find_stable_windows
+
+def merged_frame(minutes, sr_uut):
+    ts = pd.date_range("2025-05-01 08:00", periods=minutes * 60, freq="1s")
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Timestamp": ts,
+        "TA": 25 + rng.normal(0, 0.1, len(ts)),
+        "AirT": 25 + rng.normal(0, 0.1, len(ts)),
+        "SR": 500 + rng.normal(0, 5, len(ts)),
+        "SRu": np.full(len(ts), sr_uut),
+    })
+    df["TA STD-terkoreksi"] = df["TA"]
+    df["SR STD-terkoreksi"] = df["SR"]
+    return df
+
+def test_finds_windows():
+    engine = WindowStats(merged_frame(60, 500.0), {"Suhu": ["TA", "AirT", "TA"]}, "Timestamp")
+    result, alasan = find_stable_windows(engine, pd.Timedelta(minutes=10), n_best=3)
+    assert alasan is None
+    assert len(result) == 3
+
+def test_short_data_reason():
+    engine = WindowStats(merged_frame(5, 500.0), {"Suhu": ["TA", "AirT", "TA"]}, "Timestamp")
+    result, alasan = find_stable_windows(engine, pd.Timedelta(minutes=10))
+    assert result.empty and alasan == ALASAN_DATA_PENDEK
+
+def test_no_valid_statistics_reason():
+    #UUT radiasi < 100 W/m2 sepanjang data: koreksi NaN di semua kandidat
+    mapping = {"Suhu": ["TA", "AirT", "TA"], "Radiasi Matahari": ["SR", "SRu", "SR"]}
+    engine = WindowStats(merged_frame(60, 50.0), mapping, "Timestamp")
+    result, alasan = find_stable_windows(engine, pd.Timedelta(minutes=10))
+    assert result.empty and alasan == ALASAN_TANPA_STATISTIK
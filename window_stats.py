@@ -0,0 +1,139 @@
+import numpy as np
+import pandas as pd
+
+from pipeline import koreksi_uut
+
+class PrefixStats:
+    """Prefix sum, sum of squares dan jumlah data per kolom di atas timeline terurut.
+
+    Rerata, simpangan baku (ddof=1) dan jumlah data untuk rentang waktu apa pun
+    didapat dari dua binary search dan aritmetika O(1).
+    """
+
+    def __init__(self, times, columns):
+        self.times = np.asarray(times, dtype="datetime64[ns]")
+        self._prefix = {}
+        for name, values in columns.items():
+            values = np.asarray(values, dtype=float)
+            valid = ~np.isnan(values)
+            #geser dengan nilai acuan agar sum of squares tidak kehilangan presisi
+            shift = values[valid][0] if valid.any() else 0.0
+            x = np.where(valid, values - shift, 0.0)
+            self._prefix[name] = (
+                shift,
+                np.concatenate(([0], np.cumsum(valid))),
+                np.concatenate(([0.0], np.cumsum(x))),
+                np.concatenate(([0.0], np.cumsum(x * x))),
+            )
+
+    def bounds(self, start, end):
+        i = np.searchsorted(self.times, np.datetime64(start, "ns"), side="left")
+        j = np.searchsorted(self.times, np.datetime64(end, "ns"), side="right")
+        return i, max(i, j)
+
+    def stats(self, name, i, j):
+        #i dan j boleh berupa array indeks untuk menghitung banyak jendela sekaligus
+        shift, count, total, squares = self._prefix[name]
+        n = count[j] - count[i]
+        s = total[j] - total[i]
+        q = squares[j] - squares[i]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = shift + s / n
+            var = np.maximum(q - s * s / n, 0.0) / (n - 1)
+            std = np.where(n > 1, np.sqrt(var), np.nan)
+        return mean, std, n
+
+class WindowStats:
+    """Statistik per parameter untuk jendela waktu sembarang di atas df_merged."""
+
+    def __init__(self, df_merged, params_mapping, ts_col_std):
+        self.params_mapping = {
+            param_key: mapping for param_key, mapping in params_mapping.items()
+            if mapping[0] in df_merged.columns and mapping[1] in df_merged.columns
+        }
+        columns = {}
+        for param_key, (std_col, uut_col, par_code) in self.params_mapping.items():
+            columns[(param_key, "std")] = df_merged[f"{par_code} STD-terkoreksi"].to_numpy(dtype=float)
+            columns[(param_key, "uut")] = df_merged[uut_col].to_numpy(dtype=float)
+            columns[(param_key, "kor")] = koreksi_uut(df_merged, param_key, uut_col, par_code).to_numpy(dtype=float)
+        self.prefix = PrefixStats(df_merged[ts_col_std].to_numpy(), columns)
+
+    def parameter_stats(self, start, end):
+        i, j = self.prefix.bounds(start, end)
+        results = {}
+        for param_key in self.params_mapping:
+            rerata_std, stdev_std, n = self.prefix.stats((param_key, "std"), i, j)
+            rerata_uut, stdev_uut, _ = self.prefix.stats((param_key, "uut"), i, j)
+            koreksi, stdev_kor, _ = self.prefix.stats((param_key, "kor"), i, j)
+            results[param_key] = {
+                "rerata_std": float(rerata_std),
+                "stdev_std": float(stdev_std),
+                "rerata_uut": float(rerata_uut),
+                "stdev_uut": float(stdev_uut),
+                "koreksi": float(koreksi),
+                "stdev_kor": float(stdev_kor),
+                "jumlah": int(n),
+            }
+        return results
+
+#Alasan bila find_stable_windows tidak menemukan jendela
+ALASAN_TANPA_DATA = "Belum ada data gabungan atau parameter yang dipetakan"
+ALASAN_DATA_PENDEK = "Data lebih pendek dari panjang rentang yang diminta"
+ALASAN_TANPA_STATISTIK = "Tidak ada rentang dengan statistik valid untuk semua parameter (mis. koreksi kosong di seluruh data)"
+
+def find_stable_windows(engine, length, n_best=5, step=None, min_coverage=0.8):
+    """Cari jendela waktu sepanjang `length` dengan data standar dan koreksi paling stabil.
+
+    Setiap kandidat (mulai di grid `step`, default 1 menit) dinilai dengan jumlah
+    stdev standar dan stdev koreksi per parameter, masing-masing dibagi median
+    seluruh kandidat agar parameter dengan satuan berbeda setara. Hasilnya N
+    jendela terbaik yang tidak saling tumpang tindih, sebagai (DataFrame, alasan);
+    alasan None jika ada jendela, selain itu salah satu konstanta ALASAN_*.
+    """
+    length = pd.Timedelta(length)
+    step = pd.Timedelta(step) if step is not None else pd.Timedelta("1min")
+    times = engine.prefix.times
+    if len(times) == 0 or not engine.params_mapping:
+        return pd.DataFrame(), ALASAN_TANPA_DATA
+
+    first = pd.Timestamp(times[0]).floor(step)
+    last = pd.Timestamp(times[-1])
+    if last - first < length:
+        return pd.DataFrame(), ALASAN_DATA_PENDEK
+    starts = np.arange(first.to_datetime64(), (last - length + step).to_datetime64(), step.to_timedelta64()).astype("datetime64[ns]")
+    ends = starts + length.to_timedelta64()
+    i = np.searchsorted(times, starts, side="left")
+    j = np.searchsorted(times, ends, side="right")
+
+    score = np.zeros(len(starts))
+    columns = {}
+    count = None
+    for param_key in engine.params_mapping:
+        _, stdev_std, n = engine.prefix.stats((param_key, "std"), i, j)
+        _, stdev_kor, _ = engine.prefix.stats((param_key, "kor"), i, j)
+        count = n if count is None else np.minimum(count, n)
+        for name, values in ((f"STDEV {param_key} Standar", stdev_std), (f"STDEV Koreksi {param_key}", stdev_kor)):
+            scale = np.nanmedian(values) if np.isfinite(values).any() else 1.0
+            score += np.where(np.isfinite(values), values / (scale if scale > 0 else 1.0), np.inf)
+            columns[name] = values
+
+    #jendela dengan data bolong (kurang dari min_coverage x jendela terpadat) tidak ikut dinilai
+    score[count < min_coverage * count.max()] = np.inf
+
+    chosen = []
+    for idx in np.argsort(score, kind="stable"):
+        if not np.isfinite(score[idx]) or len(chosen) >= n_best:
+            break
+        if all(starts[idx] >= ends[k] or ends[idx] <= starts[k] for k in chosen):
+            chosen.append(idx)
+
+    result = pd.DataFrame({
+        "Mulai": pd.to_datetime(starts[chosen]),
+        "Selesai": pd.to_datetime(ends[chosen]),
+        "Skor": score[chosen],
+        "Jumlah Data": count[chosen],
+    })
+    for name, values in columns.items():
+        result[name] = values[chosen]
+    #semua kandidat bernilai inf: stdev NaN (mis. SR < 100 W/m2 sepanjang data) atau data bolong
+    return result, (ALASAN_TANPA_STATISTIK if result.empty else None)